@@ -2,14 +2,20 @@
 Cabfare - AI-Powered Ride Comparison
 =====================================
 CLI interface for comparing Uber and Lyft fares
+
+    python app.py                                  # example comparison
+    python app.py batch trips.csv > fares.jsonl    # price a file of trips
+    python app.py batch trips.csv --checkpoint fares.ckpt >> fares.jsonl
 """
 
+import argparse
 import sys
+from utils.config import get_setting
 from utils.fare_comparator import FareComparator
 from utils.chatbot import CabfareChatbot
 
-def main():
-    """Main CLI application"""
+def run_example():
+    """Compare fares for an example trip"""
     print("=" * 70)
     print("🚖 CABFARE - AI-Powered Ride Comparison")
     print("=" * 70)
@@ -19,8 +25,7 @@ def main():
     comparator = FareComparator()
     
     # Check if OpenAI API key is available
-    import os
-    has_openai_key = bool(os.getenv('OPENAI_API_KEY'))
+    has_openai_key = bool(get_setting('OPENAI_API_KEY'))
     chatbot = CabfareChatbot() if has_openai_key else None
     
     # Example comparison (San Francisco)
@@ -51,7 +56,8 @@ def main():
     
     if recs["fastest"]:
         fast = recs["fastest"]
-        print(f"⚡ Fastest: {fast['service']} {fast['ride_type']} - {fast['duration_minutes']:.0f} min")
+        pickup = f" + {fast['pickup_minutes']:.0f} min pickup" if fast['pickup_minutes'] is not None else ""
+        print(f"⚡ Fastest: {fast['service']} {fast['ride_type']} - {fast['duration_minutes']:.0f} min{pickup}")
     
     if recs["luxury"]:
         lux = recs["luxury"]
@@ -90,6 +96,77 @@ def main():
     print()
 
 
+def run_batch_cli(args):
+    """Price every trip in a CSV/JSONL file, writing JSONL to stdout"""
+    from utils.batch_runner import Checkpoint, read_trips, run_batch
+    
+    checkpoint = Checkpoint(args.checkpoint)
+    if checkpoint.load():
+        print(f"Resuming after row {checkpoint.next_index} ({checkpoint.written} rows written)", file=sys.stderr)
+    
+    source = sys.stdin if args.input == "-" else open(args.input, newline="")
+    try:
+        stats = run_batch(
+            read_trips(source, args.format),
+            sys.stdout,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            chunk_size=args.chunk_size,
+            checkpoint=checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            pickup_etas=args.pickup_etas
+        )
+    except ValueError as e:
+        print(f"Batch Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            print(f"Interrupted; resume with --checkpoint {args.checkpoint}", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    
+    rate = stats["trips"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"Priced {stats['trips']} trips ({stats['errors']} errors) in {stats['seconds']:.1f}s, {rate:.1f} trips/s",
+        file=sys.stderr
+    )
+
+
+def main():
+    """Main CLI application"""
+    from utils.batch_runner import DEFAULT_CHECKPOINT_INTERVAL, DEFAULT_CHUNK_SIZE
+    from utils.fare_comparator import DEFAULT_BATCH_CONCURRENCY
+    
+    parser = argparse.ArgumentParser(description="Compare Uber and Lyft fares")
+    commands = parser.add_subparsers(dest="command")
+    batch = commands.add_parser("batch", help="Price trips from CSV/JSONL, streaming JSONL to stdout")
+    batch.add_argument("input", nargs="?", default="-", help="Trips file, or - for stdin (default)")
+    batch.add_argument("--format", choices=["csv", "jsonl"], help="Input format, sniffed if omitted")
+    batch.add_argument("--workers", type=int, help="Worker processes, defaults to the CPU count; 0 runs in-process")
+    batch.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY, help="Trips priced at once per worker")
+    batch.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Trips sent to a worker at once")
+    batch.add_argument("--checkpoint", help="Progress file; an existing one resumes the run")
+    batch.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help="Seconds between checkpoint saves"
+    )
+    batch.add_argument(
+        "--pickup-etas",
+        action="store_true",
+        help="Include pickup ETAs in fastest; results then vary between runs"
+    )
+    args = parser.parse_args()
+    
+    if args.command == "batch":
+        run_batch_cli(args)
+    else:
+        run_example()
+
+
 if __name__ == "__main__":
     main()
 
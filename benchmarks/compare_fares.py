@@ -0,0 +1,153 @@
+"""
+Comparison Benchmark
+====================
+Drives FareComparator against local stub providers at fixed concurrency levels
+
+    python -m benchmarks.compare_fares --concurrency 1 8 32 128 --requests 500
+    python -m benchmarks.compare_fares --latency-ms 80 --error-rate 0.02 --throttle-rate 0.01 --cache
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from utils.async_runner import run_sync
+from utils.fare_comparator import FareComparator
+from utils.http_pool import PoolConfig
+from utils.lyft_api import LyftAPI
+from utils.uber_api import UberAPI
+
+from .stub_servers import LatencyProfile, StubProviderServer, spawn_stub
+
+# Trips are drawn around downtown San Francisco
+CENTER = (37.7749, -122.4194)
+
+
+def make_trips(count: int, unique_routes: int, seed: int) -> List[Tuple[float, float, float, float]]:
+    """Trips drawn from a fixed pool of routes, so repeats hit the cache"""
+    rng = random.Random(seed)
+    routes = [
+        (
+            CENTER[0] + rng.uniform(-0.05, 0.05),
+            CENTER[1] + rng.uniform(-0.05, 0.05),
+            CENTER[0] + rng.uniform(-0.1, 0.1),
+            CENTER[1] + rng.uniform(-0.1, 0.1)
+        )
+        for _ in range(unique_routes)
+    ]
+    return [rng.choice(routes) for _ in range(count)]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def drive(
+    comparator: FareComparator,
+    trips: List[Tuple[float, float, float, float]],
+    concurrency: int
+) -> Tuple[List[float], Counter, float]:
+    """Run every trip with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    
+    async def one(trip):
+        async with semaphore:
+            start = time.perf_counter()
+            comparison = await comparator.compare_fares_async(*trip)
+            latencies.append(time.perf_counter() - start)
+            statuses.update(comparison["provider_status"].values())
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(trip) for trip in trips))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def run_level(args, uber_url: str, lyft_url: str, concurrency: int) -> Dict:
+    """Benchmark one concurrency level with a fresh comparator"""
+    pool = PoolConfig(max_connections=args.pool_size, max_keepalive_connections=args.pool_size, http2=args.http2)
+    comparator = FareComparator(
+        enable_cache=args.cache,
+        pickup_etas=args.pickup_etas,
+        uber=UberAPI(api_key="bench", pool_config=pool, hedge_requests=args.hedge, base_url=uber_url),
+        lyft=LyftAPI(api_key="bench", pool_config=pool, hedge_requests=args.hedge, base_url=lyft_url)
+    )
+    trips = make_trips(args.warmup + args.requests, args.unique_routes, args.seed)
+    # Provider clients report failures with print; keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_sync(drive(comparator, trips[:args.warmup], concurrency))
+        latencies, statuses, elapsed = run_sync(drive(comparator, trips[args.warmup:], concurrency))
+    ordered = sorted(latencies)
+    total = sum(statuses.values())
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "provider_ok": sum(statuses[s] for s in ("ok", "cached", "stale")) / total if total else 0.0,
+        "statuses": dict(statuses),
+        "stats": comparator.stats()
+    }
+
+
+def main():
+    """Start stub providers and print a latency table per concurrency level"""
+    parser = argparse.ArgumentParser(description="Cabfare compare_fares benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="Measured comparisons per level")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured comparisons per level")
+    parser.add_argument("--unique-routes", type=int, default=10000, help="Distinct routes trips are drawn from")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median provider latency")
+    parser.add_argument("--sigma", type=float, default=0.4, help="Log-normal latency spread")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of very slow responses")
+    parser.add_argument("--tail-ms", type=float, default=1000.0, help="Latency of slow responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--cache", action="store_true", help="Enable the fare cache")
+    parser.add_argument("--pickup-etas", action="store_true", help="Request pickup ETAs alongside prices")
+    parser.add_argument("--hedge", action="store_true", help="Enable hedged requests")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 if h2 is installed")
+    parser.add_argument("--pool-size", type=int, default=100, help="Connections per provider")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for trips and stub servers")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    parser.add_argument("--in-process", action="store_true", help="Run stub servers as threads in this process")
+    args = parser.parse_args()
+    
+    latency = LatencyProfile(args.latency_ms, args.sigma, args.tail_rate, args.tail_ms)
+    stub_args = dict(latency=latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+    with contextlib.ExitStack() as stack:
+        if args.in_process:
+            uber_url = stack.enter_context(StubProviderServer("uber", seed=args.seed, **stub_args)).url
+            lyft_url = stack.enter_context(StubProviderServer("lyft", seed=args.seed + 1, **stub_args)).url
+        else:
+            uber_url, uber_process = spawn_stub("uber", seed=args.seed, **stub_args)
+            stack.callback(uber_process.terminate)
+            lyft_url, lyft_process = spawn_stub("lyft", seed=args.seed + 1, **stub_args)
+            stack.callback(lyft_process.terminate)
+        
+        if not args.json:
+            print(f"{'conc':>5} {'reqs':>6} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ok':>7}")
+        for concurrency in args.concurrency:
+            result = run_level(args, uber_url, lyft_url, concurrency)
+            if args.json:
+                print(json.dumps(result, default=str))
+                continue
+            print(
+                f"{result['concurrency']:>5} {result['requests']:>6} {result['throughput_rps']:>9.1f} "
+                f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                f"{result['provider_ok']:>7.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Decode Benchmark
+================
+Compares schema decoding of provider responses with json.loads plus hand parsing
+
+    python -m benchmarks.decode_options
+    python -m benchmarks.decode_options --iterations 50000 --json
+"""
+
+import argparse
+import json
+import timeit
+from typing import Callable, Dict, List, Optional
+
+from utils.fare_options import FareOption
+from utils.provider_schemas import decode_options
+
+from .stub_servers import lyft_costs, uber_prices
+
+
+def legacy_decode(provider: str, body: bytes) -> List[FareOption]:
+    """The previous path: ``response.json()`` then one FareOption per entry"""
+    data = json.loads(body)
+    if provider == "uber":
+        return [FareOption.from_uber(price) for price in data.get("prices", [])]
+    return [FareOption.from_lyft(cost) for cost in data.get("cost_estimates", [])]
+
+
+def make_payloads(copies: int) -> Dict[str, tuple]:
+    """Benchmark cases: name -> (provider, JSON body)"""
+    uber = uber_prices(5.0, 1.2)
+    lyft = lyft_costs(5.0, 1.2)
+    large = {"prices": uber["prices"] * copies}
+    malformed = json.loads(json.dumps(uber))
+    del malformed["prices"][1]["low_estimate"]
+    return {
+        "uber": ("uber", json.dumps(uber).encode()),
+        "lyft": ("lyft", json.dumps(lyft).encode()),
+        f"uber x{copies}": ("uber", json.dumps(large).encode()),
+        "uber malformed": ("uber", json.dumps(malformed).encode())
+    }
+
+
+def time_per_call(fn: Callable[[], object], iterations: int) -> Optional[float]:
+    """Best-of-5 microseconds per call, or None if the call raises"""
+    try:
+        fn()
+    except Exception:
+        return None
+    return min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations * 1e6
+
+
+def main():
+    """Print microseconds per response for both decoders"""
+    parser = argparse.ArgumentParser(description="Cabfare provider decode benchmark")
+    parser.add_argument("--iterations", type=int, default=20000, help="Decodes per timing run")
+    parser.add_argument("--copies", type=int, default=10, help="Price list repeats in the large case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+    
+    # Compile the schemas outside the timed region
+    decode_options("uber", b'{"prices": []}')
+    
+    if not args.json:
+        print(f"{'case':<16} {'bytes':>6} {'options':>8} {'legacy us':>10} {'schema us':>10} {'speedup':>8}")
+    for name, (provider, body) in make_payloads(args.copies).items():
+        decoded = decode_options(provider, body)
+        legacy = time_per_call(lambda: legacy_decode(provider, body), args.iterations)
+        schema = time_per_call(lambda: decode_options(provider, body), args.iterations)
+        result = {
+            "case": name,
+            "bytes": len(body),
+            "options": len(decoded.options),
+            "rejected": decoded.rejected,
+            "legacy_us": legacy,
+            "schema_us": schema,
+            "speedup": legacy / schema if legacy else None
+        }
+        if args.json:
+            print(json.dumps(result))
+            continue
+        legacy_text = f"{legacy:>10.2f}" if legacy is not None else f"{'raises':>10}"
+        speedup_text = f"{result['speedup']:>7.2f}x" if legacy is not None else f"{'-':>8}"
+        print(
+            f"{name:<16} {len(body):>6} {len(decoded.options):>8} "
+            f"{legacy_text} {schema:>10.2f} {speedup_text}"
+        )
+
+
+if __name__ == "__main__":
+    main()
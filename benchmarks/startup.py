@@ -0,0 +1,80 @@
+"""
+Startup Benchmark
+=================
+Measures import time of the Cabfare entry points and fails on regressions
+
+    python benchmarks/startup.py [--runs 10] [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points and the statement that imports them
+TARGETS = {
+    "app": "import app",
+    "utils.fare_comparator": "import utils.fare_comparator",
+    "utils.chatbot": "import utils.chatbot",
+    "utils.shared": "import utils.shared"
+}
+
+# Heavy modules that must only be imported on first use
+LAZY_MODULES = ("openai", "numpy", "tiktoken", "dotenv", "pydantic")
+
+
+def _run(statement: str) -> float:
+    """Wall-clock seconds for a fresh interpreter to run a statement"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def measure(statement: str, runs: int) -> float:
+    """Median seconds over several runs (after one warm-up run)"""
+    _run(statement)
+    return statistics.median(_run(statement) for _ in range(runs))
+
+
+def eager_imports(statement: str) -> List[str]:
+    """Lazy modules that were imported anyway by a statement"""
+    probe = (
+        f"{statement}\nimport json, sys\n"
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Print import times per entry point; exit 1 if over budget"""
+    parser = argparse.ArgumentParser(description="Cabfare startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per entry point")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Allowed import time over a bare interpreter")
+    args = parser.parse_args()
+    
+    baseline = measure("pass", args.runs)
+    print(f"{'entry point':<24}{'import ms':>10}  eager heavy imports")
+    failures: Dict[str, str] = {}
+    for name, statement in TARGETS.items():
+        elapsed_ms = (measure(statement, args.runs) - baseline) * 1000
+        eager = eager_imports(statement)
+        print(f"{name:<24}{elapsed_ms:>10.1f}  {', '.join(eager) or '-'}")
+        if elapsed_ms > args.budget_ms:
+            failures[name] = f"{elapsed_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget"
+        elif eager:
+            failures[name] = f"imports {', '.join(eager)} at startup"
+    
+    for name, reason in failures.items():
+        print(f"FAIL {name}: {reason}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Stub Provider Servers
+=====================
+Local HTTP servers speaking the Uber and Lyft estimate formats for benchmarks
+"""
+
+import json
+import math
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+UBER_RIDE_TYPES = [("UberX", 1.0), ("UberXL", 1.6), ("Uber Comfort", 1.3), ("Uber Black", 2.4)]
+LYFT_RIDE_TYPES = [("Lyft", 1.0), ("Lyft XL", 1.5), ("Lyft Lux", 2.2)]
+
+# Pickup wait relative to the standard ride type; larger cars are scarcer
+PICKUP_FACTORS = {"UberXL": 1.4, "Uber Comfort": 1.2, "Uber Black": 1.8, "Lyft XL": 1.4, "Lyft Lux": 1.8}
+
+
+class LatencyProfile:
+    """Log-normal response latency with an optional slow tail"""
+    
+    def __init__(
+        self,
+        median_ms: float = 50.0,
+        sigma: float = 0.4,
+        tail_rate: float = 0.0,
+        tail_ms: float = 1000.0
+    ):
+        """
+        Args:
+            median_ms: Median latency in milliseconds
+            sigma: Log-normal shape; larger values widen the distribution
+            tail_rate: Fraction of requests delayed by tail_ms instead
+            tail_ms: Latency of tail requests in milliseconds
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+    
+    def sample(self, rng: random.Random) -> float:
+        """One latency in seconds"""
+        if self.tail_rate and rng.random() < self.tail_rate:
+            return self.tail_ms / 1000
+        return self.median_ms * math.exp(rng.gauss(0.0, self.sigma)) / 1000
+
+
+def _trip_distance(query: Dict[str, List[str]]) -> float:
+    """Rough trip length in miles from the request coordinates"""
+    def coord(*names: str) -> float:
+        for name in names:
+            if name in query:
+                return float(query[name][0])
+        return 0.0
+    
+    dlat = coord("start_latitude", "start_lat") - coord("end_latitude", "end_lat")
+    dlng = coord("start_longitude", "start_lng") - coord("end_longitude", "end_lng")
+    return max(math.hypot(dlat * 69.0, dlng * 54.6), 0.5)
+
+
+def uber_prices(distance: float, surge: float) -> Dict:
+    """Body of an Uber /estimates/price response"""
+    prices = []
+    for name, factor in UBER_RIDE_TYPES:
+        low = round((2.5 + 1.8 * distance) * factor * surge)
+        high = round(low * 1.25)
+        prices.append({
+            "localized_display_name": name,
+            "display_name": name,
+            "low_estimate": low,
+            "high_estimate": high,
+            "estimate": f"${low}-{high}",
+            "duration": int(distance * 150 + 240),
+            "distance": round(distance, 2),
+            "surge_multiplier": surge,
+            "currency_code": "USD"
+        })
+    return {"prices": prices}
+
+
+def lyft_costs(distance: float, surge: float) -> Dict:
+    """Body of a Lyft /cost response"""
+    estimates = []
+    for name, factor in LYFT_RIDE_TYPES:
+        low = int((250 + 175 * distance) * factor * surge)
+        estimates.append({
+            "ride_type": name.lower().replace(" ", "_"),
+            "display_name": name,
+            "estimated_cost_cents_min": low,
+            "estimated_cost_cents_max": int(low * 1.2),
+            "estimated_duration_seconds": int(distance * 150 + 240),
+            "estimated_distance_miles": round(distance, 2),
+            "primetime_percentage": f"{round((surge - 1) * 100)}%",
+            "currency": "USD"
+        })
+    return {"cost_estimates": estimates}
+
+
+def uber_times(wait_seconds: float) -> Dict:
+    """Body of an Uber /estimates/time response"""
+    return {"times": [
+        {
+            "localized_display_name": name,
+            "display_name": name,
+            "estimate": int(wait_seconds * PICKUP_FACTORS.get(name, 1.0))
+        }
+        for name, _ in UBER_RIDE_TYPES
+    ]}
+
+
+def lyft_etas(wait_seconds: float) -> Dict:
+    """Body of a Lyft /eta response"""
+    return {"eta_estimates": [
+        {
+            "ride_type": name.lower().replace(" ", "_"),
+            "display_name": name,
+            "eta_seconds": int(wait_seconds * PICKUP_FACTORS.get(name, 1.0)),
+            "is_valid_estimate": True
+        }
+        for name, _ in LYFT_RIDE_TYPES
+    ]}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubProviderServer:
+    """
+    Threaded HTTP server imitating one provider's estimate endpoint
+    
+    Every GET is answered after a latency drawn from ``latency``; a share
+    of requests fail with 503 (``error_rate``) or 429 (``throttle_rate``),
+    and ``surge_rate`` of successful answers carry surge pricing. Pickup
+    ETA paths (Uber ``/estimates/time``, Lyft ``/eta``) get a 2-8 minute
+    wait; any other path is answered with estimates, so the server can
+    stand in for a provider's base URL.
+    """
+    
+    def __init__(
+        self,
+        provider: str,
+        latency: Optional[LatencyProfile] = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        surge_rate: float = 0.1,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            provider: "uber" or "lyft", selects the response format
+            latency: Response latency distribution
+            error_rate: Fraction of requests answered with 503
+            throttle_rate: Fraction of requests answered with 429
+            surge_rate: Fraction of responses with surge pricing
+            seed: Random seed for reproducible runs
+        """
+        self.provider = provider
+        self.latency = latency or LatencyProfile()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.surge_rate = surge_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _draw(self):
+        """Latency, status and surge for the next request"""
+        with self._rng_lock:
+            self.requests += 1
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+            surge = 1.0 + round(self._rng.random(), 1) if self._rng.random() < self.surge_rate else 1.0
+        if roll < self.error_rate:
+            return delay, 503, surge
+        if roll < self.error_rate + self.throttle_rate:
+            return delay, 429, surge
+        return delay, 200, surge
+    
+    def _respond(self, path: str):
+        """Status and JSON body for a request path"""
+        delay, status, surge = self._draw()
+        time.sleep(delay)
+        if status != 200:
+            return status, {"error": "unavailable" if status == 503 else "rate_limited"}
+        url = urlparse(path)
+        if url.path.endswith(("/estimates/time", "/eta")):
+            with self._rng_lock:
+                wait = self._rng.uniform(120, 480)
+            return status, uber_times(wait) if self.provider == "uber" else lyft_etas(wait)
+        distance = _trip_distance(parse_qs(url.query))
+        if self.provider == "uber":
+            return status, uber_prices(distance, surge)
+        return status, lyft_costs(distance, surge)
+    
+    def start(self) -> "StubProviderServer":
+        """Start serving on a free localhost port"""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Small responses otherwise wait on delayed ACKs (~40 ms)
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                status, body = stub._respond(self.path)
+                payload = json.dumps(body).encode()
+                headers = [
+                    f"HTTP/1.1 {status} {self.responses[status][0]}",
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(payload)}"
+                ]
+                if status == 429:
+                    headers.append("Retry-After: 1")
+                # Headers and body in one write, so one packet per response
+                self.wfile.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name=f"stub-{self.provider}",
+            daemon=True
+        )
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self) -> "StubProviderServer":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _serve(provider: str, options: Dict, urls: "multiprocessing.Queue"):
+    server = StubProviderServer(provider, **options).start()
+    urls.put(server.url)
+    threading.Event().wait()
+
+
+def spawn_stub(provider: str, **options) -> Tuple[str, multiprocessing.Process]:
+    """
+    Run a stub server in a child process
+    
+    Keeps the server's threads off the benchmarked process's GIL.
+    
+    Returns:
+        tuple: (base URL, process); terminate the process when done
+    """
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(provider, options, urls), daemon=True)
+    process.start()
+    return urls.get(timeout=10), process
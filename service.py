@@ -0,0 +1,343 @@
+"""
+Cabfare - Fare Comparison Service
+=================================
+ASGI JSON API for comparing Uber and Lyft fares
+
+Run with several worker processes:
+
+    python service.py --port 8000 --workers 4
+    uvicorn service:app --workers 4
+"""
+
+import argparse
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from utils import metrics
+from utils.config import get_setting
+from utils.fare_comparator import DEFAULT_BATCH_CONCURRENCY, FareComparator
+from utils.fare_options import json_default
+from utils.rate_limiter import INTERACTIVE
+from utils.shared import get_comparator, get_metrics_exporter
+
+# Trips a worker prices at once before shedding load with 503
+DEFAULT_MAX_IN_FLIGHT = 512
+
+# Largest accepted batch request
+DEFAULT_MAX_BATCH = 1000
+
+# Largest accepted request body in bytes
+MAX_BODY_BYTES = 1024 * 1024
+
+# Seconds clients are told to wait after a 503
+RETRY_AFTER_SECONDS = 1
+
+_TRIP_KEYS = ("start_lat", "start_lng", "end_lat", "end_lng")
+
+# Largest absolute value of each coordinate, in _TRIP_KEYS order
+_COORD_LIMITS = (90.0, 180.0, 90.0, 180.0)
+
+
+class HTTPError(Exception):
+    """An error answered with a JSON body and status code"""
+    
+    def __init__(self, status: int, message: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, default=json_default, separators=(",", ":")).encode()
+
+
+def _parse_trip(trip: Any) -> Tuple[float, float, float, float]:
+    """Validate one trip given as an object with coordinate keys"""
+    if not isinstance(trip, dict):
+        raise HTTPError(400, "Trip must be an object with start_lat, start_lng, end_lat, end_lng")
+    try:
+        coords = tuple(float(trip[key]) for key in _TRIP_KEYS)
+    except KeyError as e:
+        raise HTTPError(400, f"Missing field {e.args[0]}")
+    except (TypeError, ValueError):
+        raise HTTPError(400, "Coordinates must be numbers")
+    for key, value, limit in zip(_TRIP_KEYS, coords, _COORD_LIMITS):
+        if not math.isfinite(value) or abs(value) > limit:
+            raise HTTPError(400, f"{key} must be between -{limit:g} and {limit:g}")
+    return coords
+
+
+class CabfareService:
+    """
+    ASGI application serving fare comparisons
+    
+    Routes:
+        POST /v1/compare          one trip, JSON object in the body
+        GET  /v1/compare          one trip, coordinates in the query string
+        POST /v1/compare/batch    ``{"trips": [...]}``; results in input
+                                  order, or streamed as NDJSON in completion
+                                  order with ``Accept: application/x-ndjson``
+        GET  /healthz             liveness and in-flight load
+        GET  /metrics             Prometheus metrics (CABFARE_METRICS_PORT
+                                  or CABFARE_SERVICE_METRICS=1)
+    
+    Each worker admits at most ``max_in_flight`` trips at a time (a batch
+    counts every trip) and answers 503 with ``Retry-After`` beyond that, so
+    overload sheds quickly instead of queueing into provider deadlines.
+    Batch trips are priced at interactive priority, so they keep the
+    per-provider deadlines and never wait unbounded for rate-limit quota
+    while holding admission slots.
+    """
+    
+    def __init__(
+        self,
+        comparator_factory: Callable[[], FareComparator] = get_comparator,
+        max_in_flight: Optional[int] = None,
+        max_batch: Optional[int] = None
+    ):
+        """
+        Args:
+            comparator_factory: Returns the comparator, called on first use
+            max_in_flight: Trips admitted at once per worker, defaults to
+                CABFARE_MAX_IN_FLIGHT or DEFAULT_MAX_IN_FLIGHT
+            max_batch: Largest batch accepted, defaults to CABFARE_MAX_BATCH
+                or DEFAULT_MAX_BATCH
+        """
+        self.comparator_factory = comparator_factory
+        self.max_in_flight = max_in_flight or int(get_setting('CABFARE_MAX_IN_FLIGHT', str(DEFAULT_MAX_IN_FLIGHT)))
+        self.max_batch = max_batch or int(get_setting('CABFARE_MAX_BATCH', str(DEFAULT_MAX_BATCH)))
+        self.in_flight = 0
+        self.rejected = 0
+        self._comparator: Optional[FareComparator] = None
+        self._exporter = None
+    
+    @property
+    def comparator(self) -> FareComparator:
+        if self._comparator is None:
+            self._comparator = self.comparator_factory()
+        return self._comparator
+    
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        started = False
+        
+        async def tracked_send(message: Dict):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+        
+        try:
+            await self._route(scope, receive, tracked_send)
+        except HTTPError as e:
+            await self._send_json(send, e.status, {"error": e.message}, e.headers)
+        except Exception as e:
+            print(f"Service Error: {type(e).__name__}: {e}")
+            metrics.increment("service_errors")
+            if started:
+                # Part of a streamed body is out; let the server drop the connection
+                raise
+            await self._send_json(send, 500, {"error": "Internal server error"})
+    
+    async def _lifespan(self, receive: Callable, send: Callable):
+        """Build the comparator before the worker accepts traffic"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if get_setting('CABFARE_SERVICE_METRICS') or get_setting('CABFARE_METRICS_PORT'):
+                    self._exporter = get_metrics_exporter()
+                if self._comparator is None:
+                    self._comparator = self.comparator_factory()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._comparator is not None and self._comparator.history is not None:
+                    self._comparator.history.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _route(self, scope: Dict, receive: Callable, send: Callable):
+        method, path = scope["method"], scope["path"]
+        if path == "/v1/compare":
+            if method == "POST":
+                trip = _parse_trip(await self._read_json(receive))
+            elif method == "GET":
+                query = parse_qs(scope.get("query_string", b"").decode())
+                trip = _parse_trip({key: values[0] for key, values in query.items()})
+            else:
+                raise HTTPError(405, "Use GET or POST")
+            with self._admit(1):
+                comparison = await self.comparator.compare_fares_async(*trip)
+            await self._send_json(send, 200, comparison)
+        elif path == "/v1/compare/batch":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            body = await self._read_json(receive)
+            trips = body.get("trips") if isinstance(body, dict) else None
+            if not isinstance(trips, list):
+                raise HTTPError(400, 'Body must be {"trips": [...]}')
+            if len(trips) > self.max_batch:
+                raise HTTPError(413, f"At most {self.max_batch} trips per batch")
+            parsed = [_parse_trip(trip) for trip in trips]
+            headers = dict(scope.get("headers", []))
+            with self._admit(len(parsed)):
+                if b"application/x-ndjson" in headers.get(b"accept", b""):
+                    await self._stream_batch(send, parsed)
+                else:
+                    await self._send_json(send, 200, {"results": await self._run_batch(parsed)})
+        elif path == "/healthz":
+            await self._send_json(send, 200, {
+                "status": "ok",
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "rejected": self.rejected
+            })
+        elif path == "/metrics" and self._exporter is not None:
+            await self._send(send, 200, self._exporter.render().encode(), b"text/plain; version=0.0.4")
+        else:
+            raise HTTPError(404, "Not found")
+    
+    def _admit(self, trips: int) -> "_Admission":
+        """Reserve capacity for ``trips`` or reject with 503"""
+        if self.in_flight + trips > self.max_in_flight and self.in_flight > 0:
+            self.rejected += 1
+            metrics.increment("service_rejected")
+            raise HTTPError(
+                503,
+                "Overloaded, retry later",
+                [(b"retry-after", str(RETRY_AFTER_SECONDS).encode())]
+            )
+        return _Admission(self, trips)
+    
+    async def _run_batch(self, trips: List[Tuple[float, float, float, float]]) -> List[Dict]:
+        """Price a batch, returning results in input order"""
+        results: List[Optional[Dict]] = [None] * len(trips)
+        async for result in self.comparator.compare_fares_batch_async(
+            trips,
+            DEFAULT_BATCH_CONCURRENCY,
+            INTERACTIVE
+        ):
+            results[result["index"]] = {
+                "index": result["index"],
+                "comparison": result["comparison"],
+                "error": result["error"]
+            }
+        return results
+    
+    async def _stream_batch(self, send: Callable, trips: List[Tuple[float, float, float, float]]):
+        """Price a batch, sending one NDJSON line per trip as it completes"""
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")]
+        })
+        async for result in self.comparator.compare_fares_batch_async(
+            trips,
+            DEFAULT_BATCH_CONCURRENCY,
+            INTERACTIVE
+        ):
+            line = _dumps({
+                "index": result["index"],
+                "comparison": result["comparison"],
+                "error": result["error"]
+            })
+            await send({"type": "http.response.body", "body": line + b"\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    
+    async def _read_json(self, receive: Callable) -> Any:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(chunks))
+        except ValueError:
+            raise HTTPError(400, "Body must be valid JSON")
+    
+    async def _send_json(
+        self,
+        send: Callable,
+        status: int,
+        body: Any,
+        headers: Optional[List[Tuple[bytes, bytes]]] = None
+    ):
+        await self._send(send, status, _dumps(body), b"application/json", headers)
+    
+    async def _send(
+        self,
+        send: Callable,
+        status: int,
+        body: bytes,
+        content_type: bytes,
+        headers: Optional[List[Tuple[bytes, bytes]]] = None
+    ):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or [])
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class _Admission:
+    """Holds a service's in-flight capacity for the duration of a request"""
+    
+    __slots__ = ("service", "trips")
+    
+    def __init__(self, service: CabfareService, trips: int):
+        self.service = service
+        self.trips = trips
+        service.in_flight += trips
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.service.in_flight -= self.trips
+        return False
+
+
+app = CabfareService()
+
+
+def main():
+    """Serve the API with uvicorn"""
+    parser = argparse.ArgumentParser(description="Cabfare fare comparison service")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+    
+    try:
+        import uvicorn
+    except ImportError:
+        print("Service Error: uvicorn is not installed (pip install uvicorn)")
+        raise SystemExit(1)
+    uvicorn.run(
+        "service:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        access_log=False,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,13 @@ Streamlit interface for comparing Uber and Lyft fares using LLM
 
 import streamlit as st
 import os
-from dotenv import load_dotenv
-from utils.fare_comparator import FareComparator
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from utils.chatbot import CabfareChatbot
+from utils.config import load_config
+from utils.shared import create_chatbot, get_comparator
 
-load_dotenv()
+load_config()
 
 # Page configuration
 st.set_page_config(
@@ -19,12 +21,36 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if "comparator" not in st.session_state:
-    st.session_state.comparator = FareComparator()
+SUMMARY_INTRO = "I've compared the fares for your trip!\n\n"
 
+
+@st.cache_resource
+def get_summary_executor() -> ThreadPoolExecutor:
+    """Worker threads shared by all sessions for LLM summaries"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="cabfare-summary")
+
+
+def start_summary(chatbot: CabfareChatbot, comparison: dict) -> dict:
+    """Generate a summary in the background, collecting streamed chunks"""
+    job = {"chunks": [], "done": threading.Event()}
+    
+    def run():
+        try:
+            for chunk in chatbot.generate_summary_stream(comparison):
+                job["chunks"].append(chunk)
+        finally:
+            job["done"].set()
+    
+    get_summary_executor().submit(run)
+    return job
+
+
+# Shared by every session: provider pools, caches and LLM clients
+comparator = get_comparator()
+
+# Initialize session state (conversation only)
 if "chatbot" not in st.session_state:
-    st.session_state.chatbot = CabfareChatbot()
+    st.session_state.chatbot = create_chatbot()
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -32,6 +58,9 @@ if "messages" not in st.session_state:
 if "last_comparison" not in st.session_state:
     st.session_state.last_comparison = None
 
+if "summary_job" not in st.session_state:
+    st.session_state.summary_job = None
+
 # App title
 st.title("🚖 Cabfare - AI Ride Comparison")
 st.markdown("*Compare Uber and Lyft fares instantly with AI assistance*")
@@ -51,17 +80,13 @@ with st.sidebar:
     
     if st.button("🔍 Compare Fares", type="primary", use_container_width=True):
         with st.spinner("Fetching fares from Uber and Lyft..."):
-            comparison = st.session_state.comparator.compare_fares(
+            comparison = comparator.compare_fares(
                 pickup_lat, pickup_lng, dropoff_lat, dropoff_lng
             )
             st.session_state.last_comparison = comparison
             
-            # Generate AI summary
-            summary = st.session_state.chatbot.generate_summary(comparison)
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": f"I've compared the fares for your trip!\n\n{summary}"
-            })
+            # Generate AI summary without holding back the fare tables
+            st.session_state.summary_job = start_summary(st.session_state.chatbot, comparison)
     
     st.markdown("---")
     st.caption("💡 Tip: Chat with the AI for personalized recommendations!")
@@ -93,10 +118,12 @@ if st.session_state.last_comparison:
         st.subheader("⚡ Fastest")
         if comparison["recommendations"]["fastest"]:
             fast = comparison["recommendations"]["fastest"]
+            pickup = fast['pickup_minutes']
             st.metric(
                 label=f"{fast['service']} {fast['ride_type']}",
-                value=f"{fast['duration_minutes']:.0f} min",
-                delta=fast['estimate_display']
+                value=f"{fast['duration_minutes'] + (pickup or 0):.0f} min",
+                delta=fast['estimate_display'],
+                help=f"{pickup:.0f} min pickup + {fast['duration_minutes']:.0f} min ride" if pickup is not None else None
             )
     
     with col3:
@@ -121,6 +148,7 @@ if st.session_state.last_comparison:
                     "Ride Type": opt["ride_type"],
                     "Price": opt["estimate_display"],
                     "Duration": f"{opt['duration_minutes']:.0f} min",
+                    "Pickup": f"{opt['pickup_minutes']:.0f} min" if opt['pickup_minutes'] is not None else "-",
                     "Distance": f"{opt['distance_miles']:.1f} mi",
                     "Surge": f"{opt['surge']}x" if opt['surge'] > 1 else "No surge"
                 }
@@ -136,8 +164,9 @@ if st.session_state.last_comparison:
                     "Ride Type": opt["ride_type"],
                     "Price": opt["estimate_display"],
                     "Duration": f"{opt['duration_minutes']:.0f} min",
+                    "Pickup": f"{opt['pickup_minutes']:.0f} min" if opt['pickup_minutes'] is not None else "-",
                     "Distance": f"{opt['distance_miles']:.1f} mi",
-                    "Surge": opt['surge']
+                    "Surge": f"{opt['surge']:.2f}x" if opt['surge'] > 1 else "No surge"
                 }
                 for opt in comparison["lyft"]
             ])
@@ -152,6 +181,26 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
+# Show the AI summary as it arrives, with the template summary until then
+if st.session_state.summary_job:
+    @st.fragment(run_every=0.3)
+    def show_pending_summary():
+        job = st.session_state.summary_job
+        if job is None:
+            return
+        # The template summary stands in until chunks arrive, and for good if none do
+        summary = "".join(job["chunks"]).strip() or st.session_state.last_comparison["comparison_summary"]
+        with st.chat_message("assistant"):
+            st.markdown(SUMMARY_INTRO + summary)
+            if not job["done"].is_set():
+                st.caption("✍️ Writing AI summary...")
+        if job["done"].is_set():
+            st.session_state.messages.append({"role": "assistant", "content": SUMMARY_INTRO + summary})
+            st.session_state.summary_job = None
+            st.rerun()
+    
+    show_pending_summary()
+
 # Chat input
 if prompt := st.chat_input("Ask me anything about your ride options..."):
     # Add user message
@@ -161,12 +210,12 @@ if prompt := st.chat_input("Ask me anything about your ride options..."):
     
     # Get AI response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            response = st.session_state.chatbot.chat(
+        response = st.write_stream(
+            st.session_state.chatbot.chat_stream(
                 prompt,
                 fare_data=st.session_state.last_comparison
             )
-            st.markdown(response)
+        )
     
     st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -178,6 +227,7 @@ st.caption("🚖 Cabfare - Powered by OpenAI GPT | Data from Uber & Lyft APIs")
 with st.sidebar:
     if st.button("🗑️ Clear Chat", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.summary_job = None
         st.session_state.chatbot.reset_conversation()
         st.rerun()
 
@@ -0,0 +1,81 @@
+"""
+Test Fixtures
+=============
+In-process fake providers shared by the test modules
+"""
+
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from utils.fare_comparator import FareComparator
+from utils.fare_options import LYFT, UBER, FareOption
+from utils.provider_schemas import DecodedOptions
+from utils.rate_limiter import request_priority
+
+TRIP = (37.7749, -122.4194, 37.7849, -122.4094)
+
+
+class FakeProvider:
+    """
+    Stands in for UberAPI or LyftAPI with a fixed answer after ``delay`` seconds
+    
+    Every call's request priority is recorded so tests can check what the
+    comparator asked for.
+    """
+    
+    def __init__(self, service: str, delay: float = 0.0, price: float = 10.0, error: Optional[Exception] = None):
+        self.service = service
+        self.delay = delay
+        self.price = price
+        self.error = error
+        self.calls = 0
+        self.priorities: List[str] = []
+    
+    async def _options(self, *coords) -> DecodedOptions:
+        self.calls += 1
+        self.priorities.append(request_priority.get())
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return DecodedOptions([FareOption(self.service, f"{self.service} Standard", self.price, self.price + 4, 12.0)])
+    
+    get_price_options_async = _options
+    get_cost_options_async = _options
+    
+    async def get_time_estimate_async(self, lat: float, lng: float):
+        return {}
+    
+    async def get_eta_async(self, lat: float, lng: float):
+        return {}
+
+
+class FakeModel:
+    """Fare model that always estimates a fixed price"""
+    
+    def has_service(self, service: str) -> bool:
+        return True
+    
+    def predict(self, service: str, coords) -> List[FareOption]:
+        return [FareOption(service, "estimate", 1.0, 2.0, estimated=True, confidence=0.5)]
+
+
+@pytest.fixture(autouse=True)
+def clean_settings(monkeypatch):
+    """Keep a developer's environment from configuring limits or history"""
+    for name in (
+        "UBER_RATE_LIMIT", "UBER_RATE_BURST", "LYFT_RATE_LIMIT", "LYFT_RATE_BURST",
+        "CABFARE_HISTORY_PATH", "CABFARE_PICKUP_ETAS", "CABFARE_METRICS_PORT"
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def make_comparator():
+    """Build FareComparators over fake providers: ``make_comparator(uber_delay=..., **kwargs)``"""
+    def build(uber_delay: float = 0.0, lyft_delay: float = 0.0, **kwargs) -> FareComparator:
+        kwargs.setdefault("uber", FakeProvider(UBER, uber_delay))
+        kwargs.setdefault("lyft", FakeProvider(LYFT, lyft_delay, price=9.0))
+        return FareComparator(**kwargs)
+    return build
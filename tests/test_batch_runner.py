@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from utils import batch_runner
+from utils.batch_runner import Checkpoint, read_trips, run_batch
+
+from .conftest import TRIP
+
+
+@pytest.fixture
+def comparator(make_comparator, monkeypatch):
+    """Price run_batch(workers=0) trips with fake providers"""
+    comparator = make_comparator()
+    monkeypatch.setattr(batch_runner, "_comparator", comparator)
+    return comparator
+
+
+def test_read_trips_sniffs_csv_and_jsonl():
+    csv_trips = list(read_trips(io.StringIO("\nstart_lat,start_lng,end_lat,end_lng,id\n1,2,3,4,a\n")))
+    assert csv_trips == [{"start_lat": "1", "start_lng": "2", "end_lat": "3", "end_lng": "4", "id": "a"}]
+    jsonl = '[1, 2, 3, 4]\n\n{"start_lat": 1}\nnot json\n'
+    assert list(read_trips(io.StringIO(jsonl))) == [[1, 2, 3, 4], {"start_lat": 1}, "not json"]
+
+
+def test_read_trips_requires_coordinate_columns():
+    with pytest.raises(ValueError, match="end_lng"):
+        list(read_trips(io.StringIO("start_lat,start_lng,end_lat\n1,2,3\n")))
+
+
+def test_checkpoint_tracks_ranges_finished_out_of_order(tmp_path):
+    path = str(tmp_path / "progress.json")
+    checkpoint = Checkpoint(path)
+    checkpoint.mark(4, 6, 2)
+    assert checkpoint.next_index == 0
+    checkpoint.save()
+    
+    resumed = Checkpoint(path)
+    resumed.load()
+    assert [resumed.is_done(index) for index in range(7)] == [False] * 4 + [True] * 2 + [False]
+    checkpoint.mark(0, 4, 4)
+    assert (checkpoint.next_index, checkpoint.completed, checkpoint.written) == (6, {}, 6)
+
+
+def test_run_batch_writes_every_row_with_errors_inline(comparator):
+    out = io.StringIO()
+    stats = run_batch([list(TRIP), "not json", {"start_lat": 1}], out, workers=0, chunk_size=2)
+    rows = sorted((json.loads(line) for line in out.getvalue().splitlines()), key=lambda row: row["index"])
+    assert [row["error"] is None for row in rows] == [True, False, False]
+    assert rows[0]["comparison"]["provider_status"] == {"uber": "ok", "lyft": "ok"}
+    assert (stats["trips"], stats["errors"]) == (3, 2)
+
+
+def test_resumed_run_skips_finished_rows(comparator, tmp_path):
+    path = str(tmp_path / "progress.json")
+    done = Checkpoint(path)
+    done.mark(0, 2, 2)
+    done.save()
+    
+    checkpoint = Checkpoint(path)
+    assert checkpoint.load()
+    out = io.StringIO()
+    run_batch([list(TRIP)] * 4, out, workers=0, chunk_size=1, checkpoint=checkpoint)
+    assert sorted(json.loads(line)["index"] for line in out.getvalue().splitlines()) == [2, 3]
+    
+    resumed = Checkpoint(path)
+    resumed.load()
+    assert (resumed.next_index, resumed.written) == (4, 4)
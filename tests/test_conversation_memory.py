@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from utils.chatbot import CabfareChatbot
+from utils.conversation_memory import ConversationMemory
+
+
+def filled_memory() -> ConversationMemory:
+    memory = ConversationMemory(token_budget=60, min_recent_messages=2, summary_max_tokens=10, count_tokens=len)
+    for i in range(6):
+        memory.add("user" if i % 2 == 0 else "assistant", f"message number {i}")
+    return memory
+
+
+def test_token_usage_does_not_compact():
+    memory = filled_memory()
+    before = list(memory.messages)
+    assert memory.token_usage("system") > memory.token_budget
+    assert memory.messages == before
+    assert memory.summary == ""
+
+
+def test_build_messages_folds_old_turns_into_the_summary():
+    memory = filled_memory()
+    messages = memory.build_messages("system")
+    assert len(memory.messages) == 2
+    assert memory.summary == "- Assistant: message number 3"
+    assert messages[1]["content"].startswith("Summary of the earlier conversation")
+    assert messages[-1] == {"role": "assistant", "content": "message number 5"}
+
+
+def fake_client(create):
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def chunk(text):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def test_reply_is_added_to_history():
+    client = fake_client(lambda **kwargs: iter([chunk("Hello"), chunk(" there")]))
+    chatbot = CabfareChatbot(memory=ConversationMemory(count_tokens=len), client_factory=lambda: client)
+    assert chatbot.chat("hi") == "Hello there"
+    assert [message["role"] for message in chatbot.conversation_history] == ["user", "assistant"]
+
+
+def test_failed_request_drops_the_user_turn():
+    def create(**kwargs):
+        raise RuntimeError("service unavailable")
+    
+    client = fake_client(create)
+    chatbot = CabfareChatbot(memory=ConversationMemory(count_tokens=len), client_factory=lambda: client)
+    assert chatbot.chat("hi").startswith("Sorry, I encountered an error")
+    assert chatbot.conversation_history == []
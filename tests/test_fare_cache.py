@@ -0,0 +1,53 @@
+import pytest
+
+from utils import fare_cache
+from utils.fare_cache import FareCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock: ``clock[0] += seconds``"""
+    now = [1000.0]
+    monkeypatch.setattr(fare_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_nearby_trips_share_a_key():
+    cache = FareCache(cell_size=0.001)
+    assert cache.make_key("uber", 37.77491, -122.41941, 37.78, -122.40) == \
+        cache.make_key("uber", 37.77499, -122.41949, 37.78, -122.40)
+    assert cache.make_key("uber", 37.7749, -122.4194, 37.78, -122.40) != \
+        cache.make_key("lyft", 37.7749, -122.4194, 37.78, -122.40)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = FareCache(ttl=30, surge_ttl=10)
+    cache.put("regular", 1)
+    cache.put("surge", 2, surge=True)
+    clock[0] += 15
+    assert cache.get("regular") == 1
+    assert cache.get("surge") is None
+    clock[0] += 20
+    assert cache.get("regular") is None
+    assert len(cache) == 0
+
+
+def test_stale_window(clock):
+    cache = FareCache(ttl=10, stale_ttl=60)
+    cache.put("key", "value")
+    clock[0] += 30
+    assert cache.get_stale("key") == ("value", True)
+    assert cache.get("key") is None
+    clock[0] += 60
+    assert cache.get_stale("key") == (None, False)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = FareCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,110 @@
+import asyncio
+
+from utils import metrics
+from utils.fare_options import LYFT, UBER
+from utils.rate_limiter import BATCH, INTERACTIVE
+
+from .conftest import TRIP, FakeModel, FakeProvider
+
+
+def test_both_providers_answer(make_comparator):
+    comparator = make_comparator()
+    comparison = asyncio.run(comparator.compare_fares_async(*TRIP))
+    assert comparison["provider_status"] == {"uber": "ok", "lyft": "ok"}
+    assert not comparison["partial"]
+    assert comparison["recommendations"]["best_value"].service == LYFT
+
+
+def test_slow_provider_misses_its_deadline(make_comparator):
+    comparator = make_comparator(uber_delay=1.0, provider_timeouts={"uber": 0.05}, enable_cache=False)
+    comparison = asyncio.run(comparator.compare_fares_async(*TRIP))
+    assert comparison["provider_status"] == {"uber": "timeout", "lyft": "ok"}
+    assert comparison["partial"]
+    assert comparison["uber"] == []
+    assert len(comparison["lyft"]) == 1
+
+
+def test_provider_error_is_reported_not_raised(make_comparator):
+    comparator = make_comparator(uber=FakeProvider(UBER, error=RuntimeError("boom")), enable_cache=False)
+    comparison = asyncio.run(comparator.compare_fares_async(*TRIP))
+    assert comparison["provider_status"]["uber"] == "error"
+    assert comparison["provider_status"]["lyft"] == "ok"
+
+
+def test_fresh_response_is_served_from_cache(make_comparator):
+    comparator = make_comparator()
+    asyncio.run(comparator.compare_fares_async(*TRIP))
+    comparison = asyncio.run(comparator.compare_fares_async(*TRIP))
+    assert comparison["provider_status"] == {"uber": "cached", "lyft": "cached"}
+    assert comparator.uber.calls == 1
+
+
+def test_batch_captures_errors_per_trip(make_comparator):
+    comparator = make_comparator()
+    trips = [TRIP, {"start_lat": 1.0}, list(TRIP[:3])]
+    results = sorted(comparator.compare_fares_batch(trips), key=lambda result: result["index"])
+    assert results[0]["error"] is None and results[0]["comparison"] is not None
+    assert results[1]["error"].startswith("KeyError")
+    assert results[2]["error"].startswith("ValueError")
+
+
+def test_slow_provider_is_estimated_and_fills_the_cache(make_comparator):
+    comparator = make_comparator(uber_delay=0.3, fare_model=FakeModel(), fallback_after=0.05)
+    
+    async def run():
+        first = await comparator.compare_fares_async(*TRIP)
+        await asyncio.sleep(0.4)
+        return first, await comparator.compare_fares_async(*TRIP)
+    
+    first, second = asyncio.run(run())
+    assert first["provider_status"] == {"uber": "estimated", "lyft": "ok"}
+    assert first["estimated"]
+    assert first["uber"][0].estimated
+    assert second["provider_status"]["uber"] == "cached"
+    assert comparator.uber.calls == 1
+
+
+def test_interactive_and_batch_lookups_do_not_share_a_fetch(make_comparator):
+    comparator = make_comparator(uber_delay=0.1, lyft_delay=0.1)
+    
+    async def batch():
+        return [result async for result in comparator.compare_fares_batch_async([TRIP], 1)]
+    
+    async def run():
+        return await asyncio.gather(
+            comparator.compare_fares_async(*TRIP),
+            comparator.compare_fares_async(*TRIP),
+            batch()
+        )
+    
+    asyncio.run(run())
+    assert comparator.uber.calls == 2
+    assert sorted(comparator.uber.priorities) == [BATCH, INTERACTIVE]
+
+
+def test_pickup_etas_are_opt_in(make_comparator):
+    assert make_comparator().eta_cache is None
+
+
+def test_eta_failures_are_counted_not_fatal(make_comparator):
+    class Counter(metrics.MetricsHook):
+        def __init__(self):
+            self.counts = []
+        
+        def increment(self, name, value, labels):
+            self.counts.append((name, labels))
+    
+    class NoEtaProvider(FakeProvider):
+        async def get_eta_async(self, lat, lng):
+            raise RuntimeError("eta down")
+    
+    counter = Counter()
+    metrics.add_hook(counter)
+    try:
+        comparator = make_comparator(lyft=NoEtaProvider(LYFT), pickup_etas=True, eta_wait=0.1)
+        comparison = asyncio.run(comparator.compare_fares_async(*TRIP))
+    finally:
+        metrics.remove_hook(counter)
+    assert comparison["provider_status"] == {"uber": "ok", "lyft": "ok"}
+    assert comparison["lyft"][0].pickup_minutes is None
+    assert ("eta_errors", {"provider": "lyft", "error": "RuntimeError"}) in counter.counts
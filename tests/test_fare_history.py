@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from utils.fare_history import _SCHEMA, FareHistory
+from utils.fare_options import FareOption
+
+TRIP = (37.7749, -122.4194, 37.7849, -122.4094)
+OPTIONS = [FareOption("Uber", "UberX", 10.0, 14.0, 12.0, 3.0, 1.0)]
+
+
+@pytest.fixture
+def history_path(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+def fill(history: FareHistory, rows: int, age_days: float):
+    ts = time.time() - age_days * 86400
+    for _ in range(rows):
+        history.record(TRIP, OPTIONS * 10, ts=ts)
+    history.flush()
+
+
+def test_recorded_rows_are_written(history_path):
+    history = FareHistory(history_path, flush_interval=0.01)
+    history.record(TRIP, OPTIONS, ts=100.0)
+    history.record(TRIP, OPTIONS, ts=200.0)
+    history.close()
+    rows = list(history.rows())
+    assert [row["ts"] for row in rows] == [100.0, 200.0]
+    assert rows[0]["ride_type"] == "UberX" and rows[0]["price_max"] == 14.0
+    assert [row["ts"] for row in history.rows(since=150.0)] == [200.0]
+
+
+def test_full_queue_drops_rows(history_path):
+    history = FareHistory(history_path, max_pending=1, flush_interval=5)
+    history.record(TRIP, OPTIONS * 50)
+    assert history.dropped > 0
+    history.close()
+
+
+def test_compaction_deletes_old_rows_and_shrinks_the_file(history_path):
+    history = FareHistory(history_path, retention_days=1, flush_interval=0.01)
+    fill(history, 1000, age_days=5)
+    history.close()
+    size = os.path.getsize(history_path)
+    history = FareHistory(history_path, retention_days=1)
+    history.compact()
+    history.close()
+    assert list(history.rows()) == []
+    assert os.path.getsize(history_path) < size / 10
+
+
+def test_existing_file_is_converted_to_incremental_vacuum(history_path):
+    conn = sqlite3.connect(history_path)
+    conn.execute("PRAGMA journal_mode = WAL").fetchall()
+    conn.executescript(_SCHEMA)
+    conn.close()
+    history = FareHistory(history_path)
+    history.close()
+    conn = sqlite3.connect(history_path)
+    try:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
@@ -0,0 +1,35 @@
+from utils.fare_rollups import FareRollups
+
+TRIP = (37.7749, -122.4194, 37.7849, -122.4094)
+TS = 1_700_000_000.0
+
+
+def test_statistics_per_route_and_hour():
+    rollups = FareRollups()
+    for price in range(10, 20):
+        rollups.add(TRIP, "UberX", float(price), 1.0, TS)
+    stats = rollups.query(*TRIP, ts=TS)["UberX"]
+    assert stats["count"] == 10
+    assert stats["min_price"] == 10.0
+    assert stats["median_price"] == 15.0
+    assert stats["surge_frequency"] == 0.0
+    assert rollups.query(*TRIP, ts=TS + 3600) == {}
+
+
+def test_surge_episodes_are_timed():
+    rollups = FareRollups()
+    rollups.add(TRIP, "UberX", 20.0, 1.5, TS)
+    rollups.add(TRIP, "UberX", 20.0, 1.5, TS + 60)
+    rollups.add(TRIP, "UberX", 10.0, 1.0, TS + 300)
+    stats = rollups.query(*TRIP, ts=TS, ride_type="UberX")["UberX"]
+    assert stats["surge_frequency"] == 2 / 3
+    assert stats["avg_surge_minutes"] == 5.0
+
+
+def test_load_replays_history_rows():
+    rollups = FareRollups()
+    rollups.load([{
+        "ts": TS, "start_lat": TRIP[0], "start_lng": TRIP[1], "end_lat": TRIP[2], "end_lng": TRIP[3],
+        "ride_type": "Lyft", "price_min": 8.0, "price_max": 12.0, "surge": None
+    }])
+    assert rollups.query(*TRIP, ts=TS)["Lyft"]["median_price"] == 10.0
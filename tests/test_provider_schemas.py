@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from utils.fare_options import LYFT, UBER
+from utils.provider_schemas import decode_options
+
+UBER_PRICE = {
+    "localized_display_name": "UberX",
+    "low_estimate": 12,
+    "high_estimate": 16,
+    "estimate": "$12-16",
+    "duration": 900,
+    "distance": 3.5,
+    "surge_multiplier": 1.2
+}
+
+LYFT_COST = {
+    "display_name": "Lyft",
+    "estimated_cost_cents_min": 1100,
+    "estimated_cost_cents_max": 1500,
+    "estimated_duration_seconds": 840,
+    "estimated_distance_miles": 3.4,
+    "primetime_percentage": "25%"
+}
+
+
+def test_uber_bytes_decode_to_options():
+    decoded = decode_options("uber", json.dumps({"prices": [UBER_PRICE]}).encode())
+    option = decoded.options[0]
+    assert (option.service, option.ride_type, option.duration_minutes, option.surge) == (UBER, "UberX", 15.0, 1.2)
+    assert option.estimate_display == "$12-16"
+    assert decoded.rejected == 0 and not decoded.fallback
+
+
+def test_lyft_costs_are_converted_to_dollars():
+    option = decode_options("lyft", {"cost_estimates": [LYFT_COST]}).options[0]
+    assert (option.service, option.price_min, option.price_max, option.surge) == (LYFT, 11.0, 15.0, 1.25)
+
+
+@pytest.mark.parametrize("provider, item, fields", [
+    ("uber", UBER_PRICE, ("duration", "distance", "surge_multiplier")),
+    ("lyft", LYFT_COST, ("estimated_duration_seconds", "estimated_distance_miles", "primetime_percentage"))
+])
+def test_null_optional_fields_use_defaults(provider, item, fields):
+    key = "prices" if provider == "uber" else "cost_estimates"
+    decoded = decode_options(provider, {key: [{**item, **dict.fromkeys(fields)}]})
+    assert decoded.rejected == 0
+    option = decoded.options[0]
+    assert (option.duration_minutes, option.distance_miles, option.surge) == (0.0, 0.0, 1.0)
+
+
+def test_malformed_options_are_skipped_and_counted():
+    prices = [UBER_PRICE, {**UBER_PRICE, "low_estimate": "cheap"}, {"localized_display_name": "UberXL"}]
+    decoded = decode_options("uber", {"prices": prices})
+    assert [option.ride_type for option in decoded.options] == ["UberX"]
+    assert decoded.rejected == 2
+
+
+def test_response_without_options_list_raises():
+    with pytest.raises(ValueError):
+        decode_options("lyft", b'{"error": "unauthorized"}')
+    with pytest.raises(ValueError):
+        decode_options("uber", b"not json")
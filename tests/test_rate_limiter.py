@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from utils.http_pool import HTTPPool
+from utils.rate_limiter import BATCH, INTERACTIVE, RateLimitedError, RateLimiter, request_priority
+from utils.resilience import CircuitBreaker, CircuitOpenError
+
+ENDPOINT = "/estimates/price"
+
+
+def test_from_env_is_off_unless_configured():
+    assert RateLimiter.from_env("uber") is None
+
+
+def test_from_env_reads_rate_and_burst(monkeypatch):
+    monkeypatch.setenv("UBER_RATE_LIMIT", "5")
+    monkeypatch.setenv("UBER_RATE_BURST", "10")
+    limiter = RateLimiter.from_env("uber")
+    assert (limiter.rate, limiter.burst) == (5.0, 10.0)
+
+
+@pytest.mark.parametrize("rate, burst", [("0", ""), ("-1", ""), ("5", "0.5")])
+def test_from_env_rejects_unusable_limits(monkeypatch, rate, burst):
+    monkeypatch.setenv("UBER_RATE_LIMIT", rate)
+    monkeypatch.setenv("UBER_RATE_BURST", burst)
+    with pytest.raises(ValueError):
+        RateLimiter.from_env("uber")
+
+
+def test_batch_requests_leave_a_reserve(tmp_path):
+    limiter = RateLimiter("test", rate=0.001, burst=5, state_dir=str(tmp_path), batch_reserve=0.4)
+    assert [limiter.try_acquire(ENDPOINT, BATCH) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.try_acquire(ENDPOINT, BATCH) > 0.0
+    assert limiter.try_acquire(ENDPOINT, INTERACTIVE) == 0.0
+
+
+def test_interactive_request_fails_instead_of_waiting(tmp_path):
+    limiter = RateLimiter("test", rate=0.01, burst=1, state_dir=str(tmp_path), interactive_wait=0.1)
+    limiter.acquire(ENDPOINT)
+    with pytest.raises(RateLimitedError):
+        limiter.acquire(ENDPOINT)
+    assert limiter.stats() == {"throttled": 1, "rejected": 1}
+
+
+def test_try_acquire_async_keeps_the_callers_priority(tmp_path):
+    limiter = RateLimiter("test", rate=0.001, burst=5, state_dir=str(tmp_path), batch_reserve=0.4)
+    
+    async def run():
+        request_priority.set(BATCH)
+        return [await limiter.try_acquire_async(ENDPOINT) for _ in range(4)]
+    
+    waits = asyncio.run(run())
+    assert waits[:3] == [0.0, 0.0, 0.0] and waits[3] > 0.0
+
+
+def test_open_circuit_does_not_spend_a_token(tmp_path):
+    limiter = RateLimiter("test", rate=0.001, burst=1, state_dir=str(tmp_path))
+    breaker = CircuitBreaker("test", open_seconds=60.0)
+    breaker._open()
+    pool = HTTPPool("https://provider.test", {}, breaker=breaker, rate_limiter=limiter)
+    with pytest.raises(CircuitOpenError):
+        pool.get(ENDPOINT, {})
+    assert limiter.try_acquire(ENDPOINT) == 0.0
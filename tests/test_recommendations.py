@@ -0,0 +1,59 @@
+import math
+
+from utils.fare_options import LYFT, UBER, FareOption
+from utils.fare_table import FareTable
+from utils.recommendations import RecommendationEngine, ScoreWeights, is_luxury
+
+OPTIONS = [
+    FareOption(UBER, "UberX", 10.0, 14.0, 20.0, pickup_minutes=9.0),
+    FareOption(UBER, "Uber Black", 30.0, 36.0, 18.0, pickup_minutes=2.0),
+    FareOption(LYFT, "Lyft", 9.0, 13.0, 21.0),
+    FareOption(LYFT, "Lux", 25.0, 31.0, 19.0, pickup_minutes=3.0)
+]
+
+
+def test_fastest_counts_the_pickup_wait():
+    recommendations = RecommendationEngine().recommend(OPTIONS)
+    assert recommendations["best_value"].ride_type == "Lyft"
+    assert recommendations["fastest"].ride_type == "Uber Black"
+    assert recommendations["luxury"].ride_type == "Lux"
+
+
+def test_missing_pickup_is_charged_the_slowest_known_wait():
+    options = [
+        FareOption(UBER, "UberX", 10.0, 14.0, 20.0, pickup_minutes=5.0),
+        FareOption(LYFT, "Lyft", 9.0, 13.0, 21.0)
+    ]
+    assert RecommendationEngine().recommend(options)["fastest"].ride_type == "UberX"
+    options[1] = FareOption(LYFT, "Lyft", 9.0, 13.0, 19.0)
+    assert RecommendationEngine().recommend(options)["fastest"].ride_type == "Lyft"
+    assert RecommendationEngine().recommend([])["fastest"] is None
+
+
+def test_comfort_weight_favours_luxury():
+    engine = RecommendationEngine(ScoreWeights(comfort=30.0))
+    assert engine.recommend(OPTIONS)["best_overall"].ride_type == "Lux"
+    assert is_luxury("Uber Green XL") and not is_luxury("Uber Green")
+
+
+def test_table_matches_single_trip_recommendations():
+    table = FareTable(capacity=1)
+    table.append(0, OPTIONS)
+    table.append(1, OPTIONS[:1] + OPTIONS[2:3])
+    engine = RecommendationEngine()
+    result = engine.recommend_table(table)
+    assert list(result["trip"]) == [0, 1]
+    for position, trip_options in enumerate((OPTIONS, OPTIONS[:1] + OPTIONS[2:3])):
+        expected = engine.recommend(trip_options)
+        for name in ("best_value", "fastest", "best_overall"):
+            assert table.option(result[name][position]).ride_type == expected[name].ride_type
+    assert result["luxury"][1] == -1
+
+
+def test_table_round_trips_missing_values_as_none():
+    table = FareTable()
+    table.append(0, OPTIONS[2:3])
+    assert math.isnan(table.column("pickup_minutes")[0])
+    option = table.option(0)
+    assert option.pickup_minutes is None and option.confidence is None
+    assert (option.service, option.ride_type, option.price_min) == (LYFT, "Lyft", 9.0)
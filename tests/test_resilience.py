@@ -0,0 +1,105 @@
+import httpx
+import pytest
+
+from utils.http_pool import HTTPPool
+from utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def half_open_breaker() -> CircuitBreaker:
+    """A breaker whose next before_call starts a half-open period"""
+    breaker = CircuitBreaker("test", open_seconds=0.0)
+    breaker._open()
+    return breaker
+
+
+def test_failure_rate_opens_the_circuit():
+    breaker = CircuitBreaker("test", window=4, min_calls=4, open_seconds=60.0)
+    for success in (True, False, True, False):
+        assert breaker.before_call() is None
+        breaker.record(success, 0.1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("test", slow_call_seconds=1.0, window=2, min_calls=2)
+    breaker.record(True, 5.0)
+    breaker.record(True, 5.0)
+    assert breaker.state == OPEN
+
+
+def test_probe_success_closes_and_failure_reopens():
+    breaker = half_open_breaker()
+    probe = breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+    
+    breaker = half_open_breaker()
+    breaker.record(False, 0.1, breaker.before_call())
+    assert breaker.state == OPEN
+
+
+def test_calls_started_before_the_probe_are_ignored():
+    breaker = half_open_breaker()
+    probe = breaker.before_call()
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+
+
+def test_probe_from_an_earlier_half_open_period_is_ignored():
+    breaker = half_open_breaker()
+    stale = breaker.before_call()
+    breaker.record(False, 0.1, stale)
+    assert breaker.state == OPEN
+    current = breaker.before_call()
+    breaker.record(True, 0.1, stale)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True, 0.1, current)
+    assert breaker.state == CLOSED
+
+
+def test_release_frees_the_probe_slot():
+    breaker = half_open_breaker()
+    breaker.release(breaker.before_call())
+    assert breaker.before_call() is not None
+
+
+def pool_with(handler, breaker: CircuitBreaker, rate_limiter=None) -> HTTPPool:
+    pool = HTTPPool("https://provider.test", {}, breaker=breaker, rate_limiter=rate_limiter)
+    pool._client = httpx.Client(base_url=pool.base_url, transport=httpx.MockTransport(handler))
+    return pool
+
+
+def test_unexpected_exception_frees_the_probe_slot():
+    def handler(request):
+        raise ValueError("bug")
+    
+    breaker = half_open_breaker()
+    pool = pool_with(handler, breaker)
+    with pytest.raises(ValueError):
+        pool.get("/estimates", {})
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_rate_limiter_error_releases_the_probe():
+    class FailingLimiter:
+        def acquire(self, path):
+            raise RuntimeError("quota")
+    
+    breaker = half_open_breaker()
+    pool = pool_with(lambda request: httpx.Response(200), breaker, FailingLimiter())
+    with pytest.raises(RuntimeError):
+        pool.get("/estimates", {})
+    assert breaker.state == HALF_OPEN
+    pool.rate_limiter = None
+    assert pool.get("/estimates", {}).status_code == 200
+    assert breaker.state == CLOSED
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from service import CabfareService
+from utils.rate_limiter import INTERACTIVE
+
+from .conftest import TRIP
+
+TRIP_BODY = dict(zip(("start_lat", "start_lng", "end_lat", "end_lng"), TRIP))
+
+
+def call(service, method, path, body=None, query=b""):
+    """Run one request through the ASGI app, returning (status, decoded body)"""
+    sent = []
+    
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": []}
+    asyncio.run(service(scope, receive, send))
+    payload = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], json.loads(payload)
+
+
+def test_compare_returns_both_providers(make_comparator):
+    service = CabfareService(make_comparator)
+    status, body = call(service, "POST", "/v1/compare", TRIP_BODY)
+    assert status == 200
+    assert body["provider_status"] == {"uber": "ok", "lyft": "ok"}
+
+
+def test_invalid_coordinates_are_rejected(make_comparator):
+    service = CabfareService(make_comparator)
+    for value, message in (
+        ("nan", "start_lat must be between -90 and 90"),
+        ("inf", "start_lat must be between -90 and 90"),
+        ("91", "start_lat must be between -90 and 90")
+    ):
+        query = f"start_lat={value}&start_lng=0&end_lat=0&end_lng=0".encode()
+        assert call(service, "GET", "/v1/compare", query=query) == (400, {"error": message})
+    status, body = call(service, "POST", "/v1/compare", {**TRIP_BODY, "end_lng": -181})
+    assert (status, body["error"]) == (400, "end_lng must be between -180 and 180")
+    assert service.comparator.uber.calls == 0
+
+
+def test_unexpected_error_is_a_json_500():
+    def broken_factory():
+        raise RuntimeError("no comparator")
+    
+    assert call(CabfareService(broken_factory), "POST", "/v1/compare", TRIP_BODY) == (
+        500,
+        {"error": "Internal server error"}
+    )
+
+
+def test_batch_runs_at_interactive_priority(make_comparator):
+    service = CabfareService(lambda: make_comparator(enable_cache=False))
+    status, body = call(service, "POST", "/v1/compare/batch", {"trips": [TRIP_BODY, TRIP_BODY]})
+    assert status == 200
+    assert [result["index"] for result in body["results"]] == [0, 1]
+    assert set(service.comparator.uber.priorities) == {INTERACTIVE}
+    assert service.in_flight == 0
+
+
+def test_oversized_batch_is_rejected(make_comparator):
+    service = CabfareService(make_comparator, max_batch=1)
+    status, _ = call(service, "POST", "/v1/compare/batch", {"trips": [TRIP_BODY, TRIP_BODY]})
+    assert status == 413
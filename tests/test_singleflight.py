@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+class SlowCall:
+    """Counts executions and finishes once ``release`` is set"""
+    
+    def __init__(self, result=42):
+        self.result = result
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+    
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    
+    async def main():
+        call = SlowCall()
+        tasks = [asyncio.ensure_future(flight.do_async("key", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        call.release.set()
+        return call, await asyncio.gather(*tasks)
+    
+    call, results = asyncio.run(main())
+    assert results == [42] * 5
+    assert call.runs == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flight = SingleFlight()
+    
+    async def main():
+        call = SlowCall()
+        leader = asyncio.ensure_future(flight.do_async("key", call))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do_async("key", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        return call, leader, await waiter
+    
+    call, leader, result = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == 42
+    assert not call.cancelled
+
+
+def test_call_is_cancelled_once_every_caller_gives_up():
+    flight = SingleFlight()
+    
+    async def main():
+        call = SlowCall()
+        tasks = [asyncio.ensure_future(flight.do_async("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.sleep(0.01)
+        return call
+    
+    call = asyncio.run(main())
+    assert call.cancelled
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+    
+    async def main():
+        results = await asyncio.gather(
+            flight.do_async("key", fail),
+            flight.do_async("key", fail),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        call = SlowCall(7)
+        call.release.set()
+        return await flight.do_async("key", call)
+    
+    assert asyncio.run(main()) == 7
+
+
+def test_threaded_callers_share_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+    
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    waiter.start()
+    while flight.coalesced == 0:
+        pass
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+    assert results == ["done", "done"]
+    assert len(runs) == 1
+
+
+def test_threaded_error_propagates():
+    flight = SingleFlight()
+    
+    def fail():
+        raise KeyError("missing")
+    
+    with pytest.raises(KeyError):
+        flight.do("key", fail)
+    assert flight.stats()["in_flight"] == 0
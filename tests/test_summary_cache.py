@@ -0,0 +1,53 @@
+import json
+import os
+
+from utils.summary_cache import SummaryCache
+
+
+def test_key_ignores_whitespace_but_not_model():
+    key = SummaryCache.make_key("gpt", "UBER OPTIONS:\n  - UberX:   $10\n\n")
+    assert key == SummaryCache.make_key("gpt", "UBER OPTIONS:\n- UberX: $10")
+    assert key != SummaryCache.make_key("other", "UBER OPTIONS:\n- UberX: $10")
+
+
+def test_lru_eviction_and_expiry():
+    cache = SummaryCache(max_size=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.stats()["evictions"] == 1
+    
+    expired = SummaryCache(ttl=0.0)
+    expired.put("a", "A")
+    assert expired.get("a") is None
+
+
+def test_writes_are_debounced_until_flush(tmp_path):
+    path = str(tmp_path / "summaries.json")
+    cache = SummaryCache(path=path, flush_interval=60.0)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert not os.path.exists(path)
+    cache.flush()
+    with open(path, encoding="utf-8") as f:
+        assert [entry[:2] for entry in json.load(f)] == [["a", "A"], ["b", "B"]]
+    assert os.listdir(tmp_path) == ["summaries.json"]
+    assert SummaryCache(path=path).get("b") == "B"
+
+
+def test_flush_runs_after_the_interval(tmp_path):
+    path = str(tmp_path / "summaries.json")
+    cache = SummaryCache(path=path, flush_interval=0.05)
+    cache.put("a", "A")
+    timer = cache._flush_timer
+    timer.join()
+    assert SummaryCache(path=path).get("a") == "A"
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "summaries.json"
+    path.write_text("{not json")
+    assert len(SummaryCache(path=str(path))) == 0
@@ -0,0 +1,47 @@
+"""
+Async Runner
+============
+Runs provider coroutines from synchronous code on a shared event loop
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background event loop, starting it if needed"""
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name="cabfare-async",
+                daemon=True
+            )
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine to completion from synchronous code
+    
+    The coroutine is scheduled on a long-lived background loop so that
+    callers in any thread (Streamlit script threads, worker threads) can
+    use the async provider path without creating a loop per call.
+    
+    Args:
+        coro: Coroutine to run
+        timeout: Optional overall timeout in seconds
+    
+    Returns:
+        The coroutine's result
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    return future.result(timeout)
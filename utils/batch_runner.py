@@ -0,0 +1,312 @@
+"""
+Batch Runner
+============
+Streams trips from CSV/JSONL through a process pool and writes JSONL comparisons
+"""
+
+import bisect
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .async_runner import run_sync
+from .fare_comparator import DEFAULT_BATCH_CONCURRENCY, FareComparator
+from .fare_options import json_default
+
+# Trips sent to a worker at once
+DEFAULT_CHUNK_SIZE = 256
+
+# Seconds between checkpoint writes
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+
+# Chunks queued per worker, so input is read only as fast as it is priced
+_CHUNKS_PER_WORKER = 2
+
+_TRIP_KEYS = ("start_lat", "start_lng", "end_lat", "end_lng")
+
+# (index, trip) pairs and the index range [start, end) they cover
+Chunk = Tuple[int, int, List[Tuple[int, Any]]]
+
+
+def read_trips(stream: TextIO, fmt: Optional[str] = None) -> Iterator[Any]:
+    """
+    Lazily parse trips from CSV or JSONL
+    
+    CSV needs a header with start_lat, start_lng, end_lat, end_lng; other
+    columns are passed through. JSONL lines are objects with those keys or
+    ``[start_lat, start_lng, end_lat, end_lng]`` arrays. Lines that are not
+    valid JSON are yielded as the raw string and reported as errors.
+    
+    Args:
+        stream: Text stream, read one line at a time
+        fmt: "csv" or "jsonl", sniffed from the first line if omitted
+    
+    Yields:
+        One trip per data row, in input order
+    """
+    first = stream.readline()
+    while first and not first.strip():
+        first = stream.readline()
+    if not first:
+        return
+    if fmt is None:
+        fmt = "jsonl" if first.lstrip()[:1] in ("{", "[") else "csv"
+    lines = itertools.chain([first], stream)
+    
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        missing = [key for key in _TRIP_KEYS if key not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing {', '.join(missing)}")
+        yield from reader
+        return
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+class Checkpoint:
+    """
+    Records which input rows have been written, for resuming a batch
+    
+    Chunks finish out of order, so progress is kept as ``next_index`` (every
+    row before it is done) plus the finished ranges beyond it. A chunk is
+    marked only after its lines were written, and the file is flushed before
+    each save, so a resumed run never loses rows. Rows written after the
+    last save are priced and written again, so output is at-least-once;
+    deduplicate on ``index`` if that matters.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Checkpoint file; progress is only kept in memory if None
+        """
+        self.path = path
+        self.next_index = 0
+        self.completed: Dict[int, int] = {}
+        self.written = 0
+        self._skip_starts: List[int] = []
+        self._skip_ends: List[int] = []
+    
+    def load(self) -> bool:
+        """
+        Restore progress from ``path``
+        
+        Returns:
+            bool: True if a checkpoint was found
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        self.next_index = state["next_index"]
+        self.completed = {start: end for start, end in state["completed"]}
+        self.written = state.get("written", 0)
+        ranges = sorted(self.completed.items())
+        self._skip_starts = [start for start, _ in ranges]
+        self._skip_ends = [end for _, end in ranges]
+        return True
+    
+    def is_done(self, index: int) -> bool:
+        """Whether row ``index`` was finished by the run being resumed"""
+        if index < self.next_index:
+            return True
+        i = bisect.bisect_right(self._skip_starts, index) - 1
+        return i >= 0 and index < self._skip_ends[i]
+    
+    def mark(self, start: int, end: int, written: int):
+        """Record rows [start, end) as finished after ``written`` lines"""
+        self.completed[start] = max(end, self.completed.get(start, end))
+        self.written += written
+        while True:
+            ready = [s for s in self.completed if s <= self.next_index]
+            if not ready:
+                break
+            for s in ready:
+                self.next_index = max(self.next_index, self.completed.pop(s))
+    
+    def save(self):
+        """Atomically write progress to ``path``"""
+        if not self.path:
+            return
+        state = {
+            "next_index": self.next_index,
+            "completed": sorted(self.completed.items()),
+            "written": self.written
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+def _chunks(trips: Iterable[Any], chunk_size: int, checkpoint: Checkpoint) -> Iterator[Chunk]:
+    """Group unfinished trips, covering skipped rows with the chunk's range"""
+    start = 0
+    items: List[Tuple[int, Any]] = []
+    index = -1
+    for index, trip in enumerate(trips):
+        if checkpoint.is_done(index):
+            continue
+        items.append((index, trip))
+        if len(items) >= chunk_size:
+            yield start, index + 1, items
+            start, items = index + 1, []
+    if items or start <= index:
+        yield start, index + 1, items
+
+
+# Per-process state, set by _init_worker
+_comparator: Optional[FareComparator] = None
+_concurrency = DEFAULT_BATCH_CONCURRENCY
+
+
+def _setup_worker(concurrency: int, pickup_etas: bool = False):
+    """Build the comparator _price_chunk uses in this process"""
+    global _comparator, _concurrency
+    if _comparator is None:
+        # Pickup ETAs change by the second, so they are opt-in to keep output reproducible
+        _comparator = FareComparator(pickup_etas=pickup_etas)
+    _concurrency = concurrency
+
+
+def _init_worker(concurrency: int, pickup_etas: bool = False):
+    """Pool initializer; provider errors are printed, so keep stdout for results"""
+    sys.stdout = sys.stderr
+    _setup_worker(concurrency, pickup_etas)
+
+
+def _result_line(index: int, trip: Any, comparison: Optional[Dict], error: Optional[str]) -> str:
+    return json.dumps(
+        {"index": index, "trip": trip, "comparison": comparison, "error": error},
+        default=json_default,
+        separators=(",", ":")
+    )
+
+
+def _price_chunk(items: List[Tuple[int, Any]]) -> Tuple[List[str], int]:
+    """
+    Price one chunk in a worker
+    
+    Returns:
+        tuple: JSONL lines in completion order and the number of errors
+    """
+    lines = []
+    errors = 0
+    valid = []
+    for index, trip in items:
+        if isinstance(trip, str):
+            lines.append(_result_line(index, trip, None, "ValueError: Invalid JSON line"))
+            errors += 1
+        else:
+            valid.append((index, trip))
+    
+    async def price():
+        nonlocal errors
+        trips = [trip for _, trip in valid]
+        async for result in _comparator.compare_fares_batch_async(trips, _concurrency):
+            index = valid[result["index"]][0]
+            lines.append(_result_line(index, result["trip"], result["comparison"], result["error"]))
+            errors += result["error"] is not None
+    
+    if valid:
+        run_sync(price())
+    return lines, errors
+
+
+def run_batch(
+    trips: Iterable[Any],
+    out: TextIO,
+    workers: Optional[int] = None,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint: Optional[Checkpoint] = None,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    pickup_etas: bool = False
+) -> Dict[str, float]:
+    """
+    Price trips across worker processes, streaming JSONL as chunks complete
+    
+    Input is pulled lazily and at most ``_CHUNKS_PER_WORKER`` chunks per
+    worker are queued, so memory stays flat for inputs of any size. Each
+    output line is ``{"index", "trip", "comparison", "error"}`` where
+    ``index`` is the row's position in the input.
+    
+    Args:
+        trips: Trips as yielded by read_trips
+        out: Stream the JSONL lines are written to
+        workers: Worker processes, defaults to the CPU count; 0 prices in
+            this process
+        concurrency: Trips each worker prices at once
+        chunk_size: Trips sent to a worker at once
+        checkpoint: Progress to skip finished rows from and record into
+        checkpoint_interval: Seconds between checkpoint saves
+        pickup_etas: Fetch pickup ETAs so fastest includes the wait for a
+            driver; off by default since ETAs make reruns differ
+    
+    Returns:
+        dict: Trips written, errors and elapsed seconds for this run
+    """
+    checkpoint = checkpoint or Checkpoint()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    stats = {"trips": 0, "errors": 0, "seconds": 0.0}
+    start_time = last_save = time.perf_counter()
+    
+    def finish(start: int, end: int, lines: List[str], errors: int):
+        nonlocal last_save
+        for line in lines:
+            out.write(line)
+            out.write("\n")
+        stats["trips"] += len(lines)
+        stats["errors"] += errors
+        checkpoint.mark(start, end, len(lines))
+        if time.perf_counter() - last_save >= checkpoint_interval:
+            out.flush()
+            checkpoint.save()
+            last_save = time.perf_counter()
+    
+    chunks = _chunks(trips, chunk_size, checkpoint)
+    try:
+        if workers == 0:
+            _setup_worker(concurrency, pickup_etas)
+            with contextlib.redirect_stdout(sys.stderr):
+                for start, end, items in chunks:
+                    finish(start, end, *_price_chunk(items))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(concurrency, pickup_etas)) as pool:
+                pending: Dict[Future, Tuple[int, int]] = {}
+                try:
+                    
+                    def drain(limit: int):
+                        while len(pending) > limit:
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                finish(*pending.pop(future), *future.result())
+                    
+                    for start, end, items in chunks:
+                        drain(workers * _CHUNKS_PER_WORKER - 1)
+                        pending[pool.submit(_price_chunk, items)] = (start, end)
+                    drain(0)
+                except BaseException:
+                    for future in pending:
+                        future.cancel()
+                    raise
+    finally:
+        out.flush()
+        checkpoint.save()
+        stats["seconds"] = time.perf_counter() - start_time
+    return stats
+
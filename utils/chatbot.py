@@ -4,21 +4,66 @@ LLM Chatbot Interface
 Handles natural language interaction for ride comparison
 """
 
-import os
-from typing import Dict, Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterator, List, Optional
 
-load_dotenv()
+from . import metrics
+from .config import get_setting
+from .conversation_memory import ConversationMemory
+from .resilience import LatencyTracker
+from .summary_cache import SummaryCache
+
+if TYPE_CHECKING:  # openai is imported on first use to keep startup fast
+    from openai import AsyncOpenAI, OpenAI
 
 
 class CabfareChatbot:
     """LLM-powered chatbot for ride comparison"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
-        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
-        self.conversation_history = []
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        memory: Optional[ConversationMemory] = None,
+        summary_cache: Optional[SummaryCache] = None,
+        client_factory: Optional[Callable[[], "OpenAI"]] = None,
+        async_client_factory: Optional[Callable[[], "AsyncOpenAI"]] = None,
+        first_token_latency: Optional[LatencyTracker] = None
+    ):
+        """
+        Args:
+            api_key: OpenAI API key, defaults to OPENAI_API_KEY
+            memory: Conversation memory, defaults to a new ConversationMemory
+            summary_cache: Summary cache, defaults to a new SummaryCache
+            client_factory: Returns the OpenAI client to use, defaults to
+                one client per chatbot
+            async_client_factory: Returns the AsyncOpenAI client to use on
+                the running event loop, defaults to one client per chatbot
+            first_token_latency: Shared time-to-first-token tracker
+        
+        Pass the shared clients and caches from utils.shared so sessions
+        only own their conversation memory.
+        """
+        self.api_key = api_key or get_setting('OPENAI_API_KEY')
+        self.model = get_setting('OPENAI_MODEL', 'gpt-3.5-turbo')
+        if memory is None:
+            memory = ConversationMemory(
+                token_budget=int(get_setting('CABFARE_CHAT_TOKEN_BUDGET', '3000')),
+                model=self.model
+            )
+        self.memory = memory
+        if summary_cache is None:
+            summary_cache = SummaryCache(
+                ttl=float(get_setting('CABFARE_SUMMARY_CACHE_TTL', '600')),
+                path=get_setting('CABFARE_SUMMARY_CACHE_PATH') or None
+            )
+        self.summary_cache = summary_cache
+        self.first_token_latency = first_token_latency or LatencyTracker(min_samples=1)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._client_factory = client_factory
+        self._client = None
+        self._async_client_factory = async_client_factory
+        self._async_client = None
         
         # System prompt
         self.system_prompt = """You are Cabfare AI, a helpful assistant that compares ride fares 
@@ -46,43 +91,164 @@ When presenting comparisons, use emojis and formatting to make it easy to read."
         Returns:
             str: AI-generated response
         """
-        # Add fare data to context if available
-        if fare_data:
-            context = self._format_fare_data(fare_data)
-            enhanced_message = f"{user_message}\n\nFare Data:\n{context}"
-        else:
-            enhanced_message = user_message
+        return "".join(self.chat_stream(user_message, fare_data))
+    
+    def chat_stream(self, user_message: str, fare_data: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Process user message and stream the response as it is generated
         
-        # Add to conversation history
-        self.conversation_history.append({
-            "role": "user",
-            "content": enhanced_message
-        })
+        Args:
+            user_message: User's input message
+            fare_data: Optional fare comparison data to include in context
         
-        # Generate response
+        Yields:
+            str: Response text chunks
+        """
+        messages = self._prepare_chat(user_message, fare_data)
+        chunks = []
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    *self.conversation_history
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            ai_response = response.choices[0].message.content
-            
-            # Add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": ai_response
-            })
-            
-            return ai_response
-            
+            for chunk in self._stream_completion(messages, max_tokens=800, operation="chat"):
+                chunks.append(chunk)
+                yield chunk
         except Exception as e:
-            return f"Sorry, I encountered an error: {str(e)}"
+            # Without a reply the next request would carry two user turns in a row
+            self.memory.discard_last()
+            metrics.increment("llm_errors", operation="chat", error=type(e).__name__)
+            yield f"Sorry, I encountered an error: {str(e)}"
+            return
+        
+        # Add to history
+        self.memory.add("assistant", "".join(chunks))
+    
+    async def chat_stream_async(
+        self,
+        user_message: str,
+        fare_data: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """Async version of chat_stream"""
+        messages = self._prepare_chat(user_message, fare_data)
+        chunks = []
+        try:
+            async for chunk in self._stream_completion_async(messages, max_tokens=800, operation="chat"):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self.memory.discard_last()
+            metrics.increment("llm_errors", operation="chat", error=type(e).__name__)
+            yield f"Sorry, I encountered an error: {str(e)}"
+            return
+        
+        self.memory.add("assistant", "".join(chunks))
+    
+    def _prepare_chat(self, user_message: str, fare_data: Optional[Dict]) -> List[Dict[str, str]]:
+        """Record the user turn and build the messages to send"""
+        # Only the latest fare data is kept as context
+        if fare_data:
+            self.memory.set_fare_context(self._format_fare_data(fare_data))
+        
+        # Add to conversation history
+        self.memory.add("user", user_message)
+        return self.memory.build_messages(self.system_prompt)
+    
+    def _stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        operation: str
+    ) -> Iterator[str]:
+        """Stream completion text, recording time to first token and token usage"""
+        start = time.perf_counter()
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        first = True
+        for chunk in stream:
+            if chunk.usage is not None:
+                self._record_usage(chunk.usage, operation)
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            if first:
+                self._record_first_token(time.perf_counter() - start, operation)
+                first = False
+            yield text
+        metrics.observe("llm_completion", time.perf_counter() - start, operation=operation, model=self.model)
+    
+    async def _stream_completion_async(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        operation: str
+    ) -> AsyncIterator[str]:
+        """Async version of _stream_completion"""
+        start = time.perf_counter()
+        stream = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        first = True
+        async for chunk in stream:
+            if chunk.usage is not None:
+                self._record_usage(chunk.usage, operation)
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            if first:
+                self._record_first_token(time.perf_counter() - start, operation)
+                first = False
+            yield text
+        metrics.observe("llm_completion", time.perf_counter() - start, operation=operation, model=self.model)
+    
+    def _record_first_token(self, seconds: float, operation: str):
+        self.first_token_latency.record(seconds)
+        metrics.observe("llm_first_token", seconds, operation=operation, model=self.model)
+    
+    def _record_usage(self, usage, operation: str):
+        """Count tokens reported in the final stream chunk"""
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        metrics.increment("llm_tokens", usage.prompt_tokens, kind="prompt", operation=operation, model=self.model)
+        metrics.increment("llm_tokens", usage.completion_tokens, kind="completion", operation=operation, model=self.model)
+    
+    @property
+    def client(self) -> "OpenAI":
+        """OpenAI client, created on first use"""
+        if self._client_factory is not None:
+            return self._client_factory()
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+    
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        """Async OpenAI client, created on first use"""
+        if self._async_client_factory is not None:
+            return self._async_client_factory()
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+        return self._async_client
+    
+    def stats(self) -> Dict:
+        """Time-to-first-token percentiles in seconds, token usage and summary cache counters"""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "first_token_p50": self.first_token_latency.percentile(0.5),
+            "first_token_p95": self.first_token_latency.percentile(0.95),
+            "first_token_p99": self.first_token_latency.percentile(0.99),
+            "summary_cache": self.summary_cache.stats()
+        }
     
     def _format_fare_data(self, fare_data: Dict) -> str:
         """Format fare comparison data for LLM context"""
@@ -107,32 +273,68 @@ When presenting comparisons, use emojis and formatting to make it easy to read."
         
         if recommendations.get("fastest"):
             fast = recommendations["fastest"]
-            formatted += f"⚡ Fastest: {fast['service']} {fast['ride_type']} - {fast['duration_minutes']:.0f} min\n"
+            formatted += f"⚡ Fastest: {fast['service']} {fast['ride_type']} - {fast['duration_minutes']:.0f} min"
+            if fast.get('pickup_minutes') is not None:
+                formatted += f" + {fast['pickup_minutes']:.0f} min pickup"
+            formatted += "\n"
+        
+        typical_fares = fare_data.get("typical_fares")
+        if typical_fares:
+            formatted += "\nTYPICAL PRICES AT THIS HOUR:\n"
+            for ride_type, stats in typical_fares.items():
+                formatted += f"- {ride_type}: median ${stats['median_price']:.0f}, "
+                formatted += f"p90 ${stats['p90_price']:.0f}, "
+                formatted += f"surge {stats['surge_frequency']:.0%} of the time\n"
         
         return formatted
     
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Recent messages kept verbatim (older turns live in memory.summary)"""
+        return self.memory.messages
+    
     def reset_conversation(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.memory.clear()
     
     def generate_summary(self, fare_data: Dict) -> str:
         """Generate a natural language summary of fare comparison"""
-        prompt = f"""Based on this fare data, provide a brief, friendly summary 
-comparing Uber and Lyft options. Keep it under 100 words.
-
-{self._format_fare_data(fare_data)}"""
+        return "".join(self.generate_summary_stream(fare_data))
+    
+    def generate_summary_stream(self, fare_data: Dict) -> Iterator[str]:
+        """
+        Stream a natural language summary of fare comparison
         
+        Summaries are cached on the normalized fare data and model, so a
+        repeated fare table is answered at once without an API call.
+        """
+        context = self._format_fare_data(fare_data)
+        key = self.summary_cache.make_key(self.model, context)
+        cached = self.summary_cache.get(key)
+        metrics.increment("llm_summary_cache", result="miss" if cached is None else "hit")
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=200
-            )
-            return response.choices[0].message.content
+            messages = self._summary_messages(context)
+            for chunk in self._stream_completion(messages, max_tokens=200, operation="summary"):
+                chunks.append(chunk)
+                yield chunk
         except Exception as e:
-            return f"Error generating summary: {str(e)}"
+            metrics.increment("llm_errors", operation="summary", error=type(e).__name__)
+            yield f"Error generating summary: {str(e)}"
+            return
+        if chunks:
+            self.summary_cache.put(key, "".join(chunks))
+    
+    def _summary_messages(self, context: str) -> List[Dict[str, str]]:
+        prompt = f"""Based on this fare data, provide a brief, friendly summary 
+comparing Uber and Lyft options. Keep it under 100 words.
 
+{context}"""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
@@ -0,0 +1,31 @@
+"""
+Configuration
+=============
+Loads environment configuration once per process
+"""
+
+import os
+import threading
+from typing import Optional
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_config():
+    """Load .env into the environment on the first call; later calls return at once"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def get_setting(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a setting from the environment after loading .env"""
+    load_config()
+    return os.getenv(name, default)
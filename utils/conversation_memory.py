@@ -0,0 +1,183 @@
+"""
+Conversation Memory
+===================
+Token-budgeted chat history for the Cabfare chatbot
+"""
+
+from typing import Callable, Dict, List, Optional
+
+Message = Dict[str, str]
+
+# Rough characters per token for English text when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead the chat API adds for role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _default_counter(model: Optional[str]) -> Callable[[str], int]:
+    """Token counter for a model, using tiktoken when it is installed"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        return lambda text: (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def extractive_summary(summary: str, turns: List[Message], max_chars: int) -> str:
+    """
+    Fold turns into a rolling summary without calling the LLM
+    
+    Each turn is reduced to its first sentence; the oldest lines are dropped
+    once the summary exceeds ``max_chars``.
+    """
+    lines = summary.splitlines() if summary else []
+    for turn in turns:
+        text = " ".join(turn["content"].split())
+        first = text.split(". ")[0][:160]
+        speaker = "User" if turn["role"] == "user" else "Assistant"
+        lines.append(f"- {speaker}: {first}")
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Chat history that fits a token budget
+    
+    Recent turns are kept verbatim. When the prompt would exceed
+    ``token_budget``, the oldest turns are folded into a compact rolling
+    summary. Fare data is held as a single context block that is replaced
+    on every update instead of being copied into each user message.
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        min_recent_messages: int = 4,
+        summary_max_tokens: int = 300,
+        model: Optional[str] = None,
+        summarizer: Optional[Callable[[str, List[Message], int], str]] = None,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Args:
+            token_budget: Maximum tokens for system prompt, summary, fare
+                context and history combined
+            min_recent_messages: Messages always kept verbatim
+            summary_max_tokens: Size limit for the rolling summary
+            model: Model name, used to pick a tokenizer
+            summarizer: ``(summary, turns, max_chars) -> summary``, defaults
+                to extractive_summary
+            count_tokens: Token counter, defaults to tiktoken or a
+                characters-per-token estimate
+        """
+        self.token_budget = token_budget
+        self.min_recent_messages = min_recent_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.summarizer = summarizer or extractive_summary
+        self.model = model
+        self._count_tokens = count_tokens
+        self.messages: List[Message] = []
+        self.summary = ""
+        self.fare_context: Optional[str] = None
+        self._message_tokens: List[int] = []
+    
+    def count_tokens(self, text: str) -> int:
+        """Tokens in a text; the tokenizer is loaded on first use"""
+        if self._count_tokens is None:
+            self._count_tokens = _default_counter(self.model)
+        return self._count_tokens(text)
+    
+    def add(self, role: str, content: str):
+        """Append a message to the history"""
+        self.messages.append({"role": role, "content": content})
+        self._message_tokens.append(self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS)
+    
+    def discard_last(self):
+        """Drop the newest message, e.g. a user turn whose request failed"""
+        if self.messages:
+            self.messages.pop()
+            self._message_tokens.pop()
+    
+    def set_fare_context(self, context: Optional[str]):
+        """Replace the fare data block sent with every request"""
+        self.fare_context = context
+    
+    def clear(self):
+        """Forget all history, summary and fare context"""
+        self.messages = []
+        self._message_tokens = []
+        self.summary = ""
+        self.fare_context = None
+    
+    def build_messages(self, system_prompt: str) -> List[Message]:
+        """
+        Messages to send, compacting history first if over budget
+        
+        Args:
+            system_prompt: The chatbot's system prompt
+        
+        Returns:
+            list: Chat API messages
+        """
+        fixed = self.count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        if self.fare_context:
+            fixed += self.count_tokens(self.fare_context) + MESSAGE_OVERHEAD_TOKENS
+        self._compact(self.token_budget - fixed)
+        return self._assemble(system_prompt)
+    
+    def _assemble(self, system_prompt: str) -> List[Message]:
+        """Messages for the current history as it stands"""
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{self.summary}"
+            })
+        if self.fare_context:
+            messages.append({
+                "role": "system",
+                "content": f"Current fare data:\n{self.fare_context}"
+            })
+        messages.extend(self.messages)
+        return messages
+    
+    def _compact(self, available: int):
+        """Fold the oldest messages into the summary until history fits"""
+        summary_tokens = self.count_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+        total = sum(self._message_tokens)
+        fold = 0
+        while (
+            total + summary_tokens > available
+            and len(self.messages) - fold > self.min_recent_messages
+        ):
+            total -= self._message_tokens[fold]
+            fold += 1
+            # Assume the summary is full once anything is folded into it
+            summary_tokens = self.summary_max_tokens + MESSAGE_OVERHEAD_TOKENS
+        if not fold:
+            return
+        self.summary = self.summarizer(
+            self.summary,
+            self.messages[:fold],
+            self.summary_max_tokens * CHARS_PER_TOKEN
+        )
+        del self.messages[:fold]
+        del self._message_tokens[:fold]
+    
+    def token_usage(self, system_prompt: str = "") -> int:
+        """
+        Approximate tokens of the history as it stands
+        
+        Read-only: history over budget is only compacted by build_messages.
+        """
+        return sum(
+            self.count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            for message in self._assemble(system_prompt)
+        )
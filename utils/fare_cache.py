@@ -0,0 +1,171 @@
+"""
+Fare Cache
+==========
+TTL + LRU cache for provider fare responses keyed on quantized routes
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .geo import DEFAULT_CELL_SIZE, route_cells
+
+
+class FareCache:
+    """
+    Bounded cache of provider responses
+    
+    Keys are (provider, pickup cell, dropoff cell, ride type) so near-duplicate
+    trips share an entry. Responses with surge pricing expire sooner than
+    regular ones because surge changes quickly. Expired entries are kept for
+    ``stale_ttl`` more seconds so callers can serve them while refreshing.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 30.0,
+        surge_ttl: float = 10.0,
+        stale_ttl: float = 0.0,
+        cell_size: float = DEFAULT_CELL_SIZE
+    ):
+        """
+        Args:
+            max_size: Maximum number of entries before LRU eviction
+            ttl: Seconds a non-surge response stays fresh
+            surge_ttl: Seconds a surge response stays fresh
+            stale_ttl: Seconds past expiry an entry may still be served stale
+            cell_size: Grid cell size in degrees used to quantize coordinates
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.surge_ttl = surge_ttl
+        self.stale_ttl = stale_ttl
+        self.cell_size = cell_size
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def make_key(
+        self,
+        provider: str,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        ride_type: Optional[str] = None
+    ) -> Tuple:
+        """
+        Build a cache key for a trip
+        
+        Args:
+            provider: Provider name, e.g. "uber"
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+            ride_type: Ride type, or None for the full provider response
+        
+        Returns:
+            tuple: Hashable cache key
+        """
+        pickup, dropoff = route_cells(start_lat, start_lng, end_lat, end_lng, self.cell_size)
+        return (provider, pickup, dropoff, ride_type or "*")
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value, or None on miss or expiry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                self._expire(key, expires_at, now)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def get_stale(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """
+        Return a cached value even if it expired within the stale window
+        
+        Returns:
+            tuple: (value or None, whether the value is stale)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            value, expires_at = entry
+            if expires_at + self.stale_ttl <= now:
+                self._expire(key, expires_at, now)
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if expires_at <= now:
+                self.stale_hits += 1
+                return value, True
+            self.hits += 1
+            return value, False
+    
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until an entry expires (negative once stale), None if absent"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[1] - time.monotonic()
+    
+    def _expire(self, key: Hashable, expires_at: float, now: float):
+        """Drop an expired entry once it is past the stale window; caller holds the lock"""
+        if expires_at + self.stale_ttl <= now:
+            del self._entries[key]
+            self.expirations += 1
+    
+    def put(self, key: Hashable, value: Any, surge: bool = False):
+        """
+        Store a value
+        
+        Args:
+            key: Cache key from make_key
+            value: Value to cache
+            surge: Whether the value reflects surge pricing (shorter TTL)
+        """
+        ttl = self.surge_ttl if surge else self.ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
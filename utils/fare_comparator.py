@@ -4,17 +4,157 @@ Fare Comparison Engine
 Compares fares between Uber and Lyft and provides recommendations
 """
 
-from typing import Dict, List, Tuple
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, Tuple
+from . import metrics
 from .uber_api import UberAPI
 from .lyft_api import LyftAPI
+from .async_runner import get_loop, run_sync
+from .fare_cache import FareCache
+from .fare_options import FareOption
+from .geo import DEFAULT_CELL_SIZE, quantize, route_cells
+from .hot_routes import HotRouteTracker
+from .provider_schemas import NO_OPTIONS, DecodedOptions
+from .rate_limiter import BATCH, request_priority
+from .recommendations import RecommendationEngine
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:  # optional components, imported by callers that use them
+    from .fare_history import FareHistory
+    from .fare_model import FareModel
+    from .fare_rollups import FareRollups
+
+# Default per-provider deadline in seconds
+DEFAULT_PROVIDER_TIMEOUT = 5.0
+
+# Default number of trips priced at once by compare_fares_batch
+DEFAULT_BATCH_CONCURRENCY = 32
+
+_TRIP_KEYS = ("start_lat", "start_lng", "end_lat", "end_lng")
+
+# Seconds an expired response may be served while it is refreshed
+DEFAULT_STALE_TTL = 60.0
+
+# Hot routes are re-fetched when their cache entry has less than this many seconds left
+DEFAULT_REFRESH_AHEAD = 5.0
+
+# Seconds between proactive refresh sweeps over hot routes
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+# Seconds a pickup ETA stays fresh; drivers move, so this is much shorter than fare TTLs
+DEFAULT_ETA_TTL = 20.0
+
+# Pickup ETAs are shared by every trip starting in the same cell (~550 m)
+DEFAULT_ETA_CELL_SIZE = 0.005
+
+# Deadline in seconds for one pickup ETA request
+DEFAULT_ETA_TIMEOUT = 2.0
+
+# Seconds an interactive caller waits for a provider before a fare model estimate is served
+DEFAULT_FALLBACK_AFTER = 1.0
+
+_PROVIDERS = ("uber", "lyft")
+
+# Provider statuses that count as a complete answer
+_OK_STATUSES = ("ok", "cached", "stale")
+
+# Provider statuses answered by the local fare model instead of the provider
+_ESTIMATED = "estimated"
 
 
 class FareComparator:
     """Compares ride fares between Uber and Lyft"""
     
-    def __init__(self):
-        self.uber = UberAPI()
-        self.lyft = LyftAPI()
+    def __init__(
+        self,
+        provider_timeouts: Optional[Dict[str, float]] = None,
+        cache: Optional[FareCache] = None,
+        enable_cache: bool = True,
+        stale_while_revalidate: bool = False,
+        hot_routes: Optional[HotRouteTracker] = None,
+        refresh_ahead: float = DEFAULT_REFRESH_AHEAD,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        recommender: Optional[RecommendationEngine] = None,
+        history: Optional["FareHistory"] = None,
+        rollups: Optional["FareRollups"] = None,
+        fare_model: Optional["FareModel"] = None,
+        fallback_after: Optional[float] = DEFAULT_FALLBACK_AFTER,
+        uber: Optional[UberAPI] = None,
+        lyft: Optional[LyftAPI] = None,
+        pickup_etas: bool = False,
+        eta_cache: Optional[FareCache] = None,
+        eta_wait: float = 0.0
+    ):
+        """
+        Args:
+            provider_timeouts: Optional per-provider deadlines in seconds,
+                keyed by "uber" / "lyft"
+            cache: Provider response cache, defaults to a new FareCache
+            enable_cache: Set False to always hit the providers
+            stale_while_revalidate: Serve expired cache entries immediately
+                and refresh them in the background; hot routes are also
+                re-fetched before they expire
+            hot_routes: Tracker deciding which routes are hot, defaults to
+                a new HotRouteTracker
+            refresh_ahead: Seconds before expiry at which hot routes are
+                re-fetched
+            refresh_interval: Seconds between hot-route refresh sweeps
+            recommender: Recommendation engine, defaults to one with
+                default score weights
+            history: Store that every freshly fetched fare is recorded to
+            rollups: Per-route fare statistics updated with every freshly
+                fetched fare and attached to comparisons as typical_fares
+            fare_model: Local estimator used instead of mock data when a
+                provider fails or misses its deadline
+            fallback_after: Seconds an interactive lookup waits for a
+                provider before answering with the fare model's estimate;
+                the provider request keeps running and its response fills
+                the cache. None waits for the full provider deadline
+            uber: Uber client, defaults to a new UberAPI
+            lyft: Lyft client, defaults to a new LyftAPI
+            pickup_etas: Fetch pickup ETAs alongside prices so the fastest
+                recommendation includes the wait for a driver; costs two
+                extra provider requests per uncached pickup cell
+            eta_cache: Per-pickup-cell ETA cache, defaults to one with
+                DEFAULT_ETA_TTL and DEFAULT_ETA_CELL_SIZE
+            eta_wait: Seconds to keep waiting for ETAs once prices have
+                arrived; with the default 0 ETAs never add latency and
+                late ones only warm the cache for the next trip
+        """
+        self.uber = uber or UberAPI()
+        self.lyft = lyft or LyftAPI()
+        self.provider_timeouts = {
+            "uber": DEFAULT_PROVIDER_TIMEOUT,
+            "lyft": DEFAULT_PROVIDER_TIMEOUT,
+            **(provider_timeouts or {})
+        }
+        self.stale_while_revalidate = stale_while_revalidate and enable_cache
+        if cache is None and self.stale_while_revalidate:
+            cache = FareCache(stale_ttl=DEFAULT_STALE_TTL)
+        if not enable_cache:
+            cache = None
+        elif cache is None:
+            cache = FareCache()
+        self.cache = cache
+        self.hot_routes = hot_routes or HotRouteTracker()
+        self.refresh_ahead = refresh_ahead
+        self.refresh_interval = refresh_interval
+        self.recommender = recommender or RecommendationEngine()
+        self.history = history
+        self.rollups = rollups
+        self.fare_model = fare_model
+        self.fallback_after = fallback_after
+        if pickup_etas and eta_cache is None:
+            eta_cache = FareCache(ttl=DEFAULT_ETA_TTL, cell_size=DEFAULT_ETA_CELL_SIZE)
+        self.eta_cache = eta_cache if pickup_etas else None
+        self.eta_wait = eta_wait
+        self.flight = SingleFlight()
+        self._refreshing = set()
+        self._background_tasks = set()
+        self._refresher = None
+        if self.stale_while_revalidate:
+            self.start_refresher()
     
     def compare_fares(
         self,
@@ -26,6 +166,42 @@ class FareComparator:
         """
         Compare fares between Uber and Lyft
         
+        Both providers are queried concurrently, so latency is bounded by
+        the slower provider (or its deadline) rather than the sum of both.
+        
+        Args:
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+        
+        Returns:
+            dict: Comparison results with recommendations
+        """
+        return run_sync(self.compare_fares_async(start_lat, start_lng, end_lat, end_lng))
+    
+    async def compare_fares_async(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float
+    ) -> Dict:
+        """
+        Compare fares between Uber and Lyft from async code
+        
+        Each provider gets its own deadline from ``provider_timeouts``.
+        Providers that fail or miss their deadline are reported in
+        ``provider_status`` and the comparison is built from whatever
+        arrived in time. Fresh cached responses for the same quantized
+        route are served without calling the provider, and concurrent
+        lookups for the same quantized route share one upstream request.
+        Pickup ETAs are requested at the same time and attached to options
+        if they are cached or arrive no later than the prices.
+        With a fare model, a provider that has not answered within
+        ``fallback_after`` is estimated locally while its response is
+        still awaited in the background to fill the cache.
+        
         Args:
             start_lat: Pickup latitude
             start_lng: Pickup longitude
@@ -35,114 +211,503 @@ class FareComparator:
         Returns:
             dict: Comparison results with recommendations
         """
-        # Get estimates from both services
-        uber_data = self.uber.get_price_estimate(start_lat, start_lng, end_lat, end_lng)
-        lyft_data = self.lyft.get_cost_estimate(start_lat, start_lng, end_lat, end_lng)
+        start = time.perf_counter()
+        coords = (start_lat, start_lng, end_lat, end_lng)
+        if self.stale_while_revalidate:
+            self.hot_routes.record(route_cells(*coords, self.cache.cell_size), coords)
+        etas = self._start_eta_fetches(start_lat, start_lng) if self.eta_cache is not None else None
+        (uber_data, uber_status), (lyft_data, lyft_status) = await asyncio.gather(
+            self._fetch_provider("uber", coords),
+            self._fetch_provider("lyft", coords)
+        )
+        if etas is not None:
+            etas = await self._resolve_etas(etas)
+        
+        with metrics.stage("parse"):
+            uber_options, uber_status = self._provider_options("uber", coords, uber_data, uber_status)
+            lyft_options, lyft_status = self._provider_options("lyft", coords, lyft_data, lyft_status)
+            if etas:
+                uber_options = self._apply_pickup_etas(uber_options, etas.get("uber", {}))
+                lyft_options = self._apply_pickup_etas(lyft_options, etas.get("lyft", {}))
+        comparison = self._build_comparison(
+            uber_options,
+            lyft_options,
+            {"uber": uber_status, "lyft": lyft_status}
+        )
+        if self.rollups is not None:
+            with metrics.stage("rollups"):
+                comparison["typical_fares"] = self.rollups.query(*coords)
+        
+        metrics.increment("provider_status", provider="uber", status=uber_status)
+        metrics.increment("provider_status", provider="lyft", status=lyft_status)
+        metrics.observe("compare", time.perf_counter() - start)
+        return comparison
+    
+    def compare_fares_batch(
+        self,
+        trips: Iterable[Any],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> Iterator[Dict]:
+        """
+        Compare fares for many trips, yielding results as they complete
+        
+        Trips are pulled from ``trips`` lazily, so only ``max_concurrency``
+        trips are held in memory at a time regardless of batch size.
+        Provider calls are made at batch priority, so under a rate limit
+        they queue behind interactive requests instead of failing.
+        
+        Args:
+            trips: Iterable of (start_lat, start_lng, end_lat, end_lng)
+                tuples or dicts with those keys
+            max_concurrency: Maximum number of trips in flight
+        
+        Yields:
+            dict: ``{"index", "trip", "comparison", "error"}`` per trip,
+                in completion order. ``error`` is None on success.
+        """
+        results = self.compare_fares_batch_async(trips, max_concurrency)
+        try:
+            while True:
+                try:
+                    yield run_sync(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            run_sync(results.aclose())
+    
+    async def compare_fares_batch_async(
+        self,
+        trips: Iterable[Any],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        priority: str = BATCH
+    ) -> AsyncIterator[Dict]:
+        """
+        Async version of compare_fares_batch
+        
+        Args:
+            trips: Iterable of (start_lat, start_lng, end_lat, end_lng)
+                tuples or dicts with those keys
+            max_concurrency: Maximum number of trips in flight
+            priority: Priority of the provider calls; INTERACTIVE keeps the
+                per-provider deadlines, fare model fallback and bounded
+                rate-limit waits of compare_fares_async
+        
+        Yields:
+            dict: ``{"index", "trip", "comparison", "error"}`` per trip,
+                in completion order. ``error`` is None on success.
+        """
+        trip_iter = enumerate(trips)
+        pending = set()
+        
+        def schedule_next() -> bool:
+            for index, trip in trip_iter:
+                pending.add(asyncio.ensure_future(self._compare_trip(index, trip, priority)))
+                return True
+            return False
+        
+        try:
+            while len(pending) < max_concurrency and schedule_next():
+                pass
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    schedule_next()
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _compare_trip(self, index: int, trip: Any, priority: str = BATCH) -> Dict:
+        """Price one batch trip, capturing failures in the result"""
+        # Runs in its own task, so this only affects this trip's provider calls
+        request_priority.set(priority)
+        try:
+            coords = self._trip_coords(trip)
+            comparison = await self.compare_fares_async(*coords)
+            return {"index": index, "trip": trip, "comparison": comparison, "error": None}
+        except Exception as e:
+            return {"index": index, "trip": trip, "comparison": None, "error": f"{type(e).__name__}: {e}"}
+    
+    @staticmethod
+    def _trip_coords(trip: Any) -> Tuple[float, float, float, float]:
+        """Extract pickup/dropoff coordinates from a batch trip"""
+        if isinstance(trip, dict):
+            values = [trip[key] for key in _TRIP_KEYS]
+        else:
+            values = list(trip)
+            if len(values) != 4:
+                raise ValueError(f"Expected 4 coordinates, got {len(values)}")
+        return tuple(float(v) for v in values)
+    
+    async def _fetch_provider(
+        self,
+        provider: str,
+        coords: Tuple[float, float, float, float]
+    ) -> Tuple[DecodedOptions, str]:
+        """Fetch one provider's estimates, going through the cache when enabled"""
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(provider, *coords)
+            if self.stale_while_revalidate:
+                cached, stale = self.cache.get_stale(key)
+                if stale:
+                    self._refresh_in_background(provider, coords, key)
+                    return cached, "stale"
+            else:
+                cached = self.cache.get(key)
+            if cached is not None:
+                return cached, "cached"
+        
+        if not self._can_fall_back(provider):
+            return await self._fetch_coalesced(provider, coords, key)
+        
+        task = asyncio.ensure_future(self._fetch_coalesced(provider, coords, key))
+        try:
+            await asyncio.wait((task,), timeout=self.fallback_after)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task.done():
+            return task.result()
+        # Answer from the fare model; the request still fills the cache when it lands
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return NO_OPTIONS, "timeout"
+    
+    def _can_fall_back(self, provider: str) -> bool:
+        """Whether a slow interactive lookup may be answered by the fare model early"""
+        return (
+            self.fallback_after is not None
+            and self.fare_model is not None
+            and request_priority.get() != BATCH
+            and self.fallback_after < self.provider_timeouts[provider]
+            and self.fare_model.has_service(provider)
+        )
+    
+    async def _fetch_coalesced(
+        self,
+        provider: str,
+        coords: Tuple[float, float, float, float],
+        key: Optional[Tuple]
+    ) -> Tuple[DecodedOptions, str]:
+        """
+        Fetch from a provider, sharing the request with identical in-flight lookups
         
-        # Parse and format results
-        uber_options = self._parse_uber_data(uber_data)
-        lyft_options = self._parse_lyft_data(lyft_data)
+        Only callers of the same priority share a request: the leader's
+        priority picks the deadline and rate-limit behaviour, which must
+        not leak to an interactive caller joining a batch fetch or the
+        reverse.
+        """
+        priority = request_priority.get()
+        if key is None:
+            flight_key = (priority, provider, *route_cells(*coords, DEFAULT_CELL_SIZE))
+        else:
+            flight_key = (priority, *key)
+        return await self.flight.do_async(
+            flight_key,
+            lambda: self._fetch_and_store(provider, coords, key)
+        )
+    
+    async def _fetch_and_store(
+        self,
+        provider: str,
+        coords: Tuple[float, float, float, float],
+        key: Optional[Tuple]
+    ) -> Tuple[DecodedOptions, str]:
+        """Call a provider and cache a successful response under ``key``"""
+        if provider == "uber":
+            request = self.uber.get_price_options_async(*coords)
+        else:
+            request = self.lyft.get_cost_options_async(*coords)
+        # Batch calls may queue on the rate limiter, so only the HTTP timeouts bound them
+        timeout = None if request_priority.get() == BATCH else self.provider_timeouts[provider]
+        data, status = await self._fetch_with_deadline(request, timeout, NO_OPTIONS)
+        
+        # Mock fallback data is never cached or recorded so the real provider is retried
+        if status == "ok" and not data.fallback:
+            if key is not None:
+                self.cache.put(key, data, surge=self._has_surge(data))
+            if self.history is not None or self.rollups is not None:
+                self._record_observation(coords, data.options)
+        return data, status
+    
+    def _start_eta_fetches(self, lat: float, lng: float) -> Dict[str, Any]:
+        """
+        Look up pickup ETAs per provider, starting a fetch on cache miss
+        
+        Fetches run as independent tasks sharing one request per pickup
+        cell, so they outlive a comparison that stops waiting for them and
+        still fill the cache.
+        
+        Returns:
+            dict: Provider -> cached ride type ETAs, or the task fetching them
+        """
+        cell = quantize(lat, lng, self.eta_cache.cell_size)
+        etas = {}
+        for provider in _PROVIDERS:
+            key = (provider, cell)
+            cached = self.eta_cache.get(key)
+            if cached is not None:
+                etas[provider] = cached
+                continue
+            task = asyncio.ensure_future(self.flight.do_async(
+                ("eta", provider, cell),
+                lambda provider=provider, key=key: self._fetch_eta(provider, lat, lng, key)
+            ))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            etas[provider] = task
+        return etas
+    
+    async def _fetch_eta(self, provider: str, lat: float, lng: float, key: Tuple) -> Dict[str, float]:
+        """Call a provider's ETA endpoint and cache the parsed minutes under ``key``"""
+        if provider == "uber":
+            request = self.uber.get_time_estimate_async(lat, lng)
+        else:
+            request = self.lyft.get_eta_async(lat, lng)
+        # ETAs are best effort; failures are counted rather than printed per trip
+        try:
+            data = await asyncio.wait_for(request, DEFAULT_ETA_TIMEOUT)
+            if provider == "uber":
+                etas = self._parse_uber_etas(data)
+            else:
+                etas = self._parse_lyft_etas(data)
+        except Exception as e:
+            metrics.increment("eta_errors", provider=provider, error=type(e).__name__)
+            return {}
+        if etas:
+            self.eta_cache.put(key, etas)
+        return etas
+    
+    async def _resolve_etas(self, etas: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """ETAs that are cached or already fetched, waiting at most ``eta_wait`` for the rest"""
+        pending = [value for value in etas.values() if isinstance(value, asyncio.Future) and not value.done()]
+        if pending and self.eta_wait > 0:
+            await asyncio.wait(pending, timeout=self.eta_wait)
+        resolved = {}
+        for provider, value in etas.items():
+            if isinstance(value, asyncio.Future):
+                if not value.done() or value.cancelled() or value.exception() is not None:
+                    continue
+                value = value.result()
+            resolved[provider] = value
+        return resolved
+    
+    @staticmethod
+    def _apply_pickup_etas(options: List[FareOption], etas: Dict[str, float]) -> List[FareOption]:
+        """
+        Copies of ``options`` with pickup waits from their provider's ride type ETAs
+        
+        Options may come from the cache and be shared, so they are never modified.
+        """
+        return [option.with_pickup(etas.get(option.ride_type)) for option in options]
+    
+    def _record_observation(
+        self,
+        coords: Tuple[float, float, float, float],
+        options: List[FareOption]
+    ):
+        """Feed a fresh provider response to the history store and rollups"""
+        try:
+            if self.history is not None:
+                self.history.record(coords, options)
+            if self.rollups is not None:
+                self.rollups.add_options(coords, options)
+        except Exception as e:
+            print(f"Fare History Error: {e}")
+    
+    def typical_fares(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        ts: Optional[float] = None
+    ) -> Dict[str, Dict]:
+        """
+        Historical fare statistics for a route at a given hour of the week
+        
+        Args:
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+            ts: Time of interest, defaults to now
+        
+        Returns:
+            dict: Ride type -> statistics, empty without rollups
+        """
+        if self.rollups is None:
+            return {}
+        return self.rollups.query(start_lat, start_lng, end_lat, end_lng, ts)
+    
+    def _refresh_in_background(
+        self,
+        provider: str,
+        coords: Tuple[float, float, float, float],
+        key: Tuple
+    ):
+        """Re-fetch a cache entry without making the caller wait; at most one refresh per key"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.ensure_future(self._fetch_coalesced(provider, coords, key))
+        self._background_tasks.add(task)
+        
+        def done(task):
+            self._background_tasks.discard(task)
+            self._refreshing.discard(key)
+        
+        task.add_done_callback(done)
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Cache, request coalescing, hot-route, circuit breaker and rate limit counters"""
+        return {
+            "cache": self.cache.stats() if self.cache is not None else {},
+            "eta_cache": self.eta_cache.stats() if self.eta_cache is not None else {},
+            "coalescing": self.flight.stats(),
+            "hot_routes": self.hot_routes.stats(),
+            "breakers": {
+                "uber": {**self.uber.breaker.stats(), "hedged": self.uber.http.hedged},
+                "lyft": {**self.lyft.breaker.stats(), "hedged": self.lyft.http.hedged}
+            },
+            "rate_limits": {
+                name: api.http.rate_limiter.stats() if api.http.rate_limiter is not None else {}
+                for name, api in (("uber", self.uber), ("lyft", self.lyft))
+            }
+        }
+    
+    def start_refresher(self):
+        """Start the background sweep that keeps hot routes warm"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.run_coroutine_threadsafe(self._refresh_hot_routes(), get_loop())
+    
+    def stop_refresher(self):
+        """Stop the hot-route refresh sweep"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+    
+    async def _refresh_hot_routes(self):
+        """Periodically re-fetch hot routes whose cache entries are about to expire"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if self.cache is None:
+                continue
+            for _, coords in self.hot_routes.hot_routes():
+                for provider in _PROVIDERS:
+                    key = self.cache.make_key(provider, *coords)
+                    remaining = self.cache.ttl_remaining(key)
+                    if remaining is None or remaining < self.refresh_ahead:
+                        self._refresh_in_background(provider, coords, key)
+    
+    @staticmethod
+    def _has_surge(data: DecodedOptions) -> bool:
+        """Whether a decoded Uber or Lyft response contains surge pricing"""
+        return any(option.surge > 1.0 for option in data.options)
+    
+    async def _fetch_with_deadline(
+        self,
+        request: Awaitable[Any],
+        timeout: Optional[float],
+        empty: Any
+    ) -> Tuple[Any, str]:
+        """
+        Await a provider request, returning its data and a status of ok/timeout/error
         
+        ``empty`` stands in for the data when the request fails.
+        """
+        try:
+            return await asyncio.wait_for(request, timeout), "ok"
+        except asyncio.TimeoutError:
+            return empty, "timeout"
+        except Exception as e:
+            print(f"Provider Error: {e}")
+            return empty, "error"
+    
+    def _provider_options(
+        self,
+        provider: str,
+        coords: Tuple[float, float, float, float],
+        data: DecodedOptions,
+        status: str
+    ) -> Tuple[List[FareOption], str]:
+        """
+        A provider's decoded options, or a local estimate if the provider
+        failed, timed out or only returned mock data
+        """
+        failed = status not in _OK_STATUSES or data.fallback
+        if failed and self.fare_model is not None and self.fare_model.has_service(provider):
+            return self.fare_model.predict(provider, coords), _ESTIMATED
+        if data.fallback:
+            status = "fallback"
+        return list(data.options), status
+    
+    def _build_comparison(
+        self,
+        uber_options: List[FareOption],
+        lyft_options: List[FareOption],
+        provider_status: Dict[str, str]
+    ) -> Dict:
+        """Build the comparison result from parsed provider options"""
         # Find best deals
-        recommendations = self._generate_recommendations(uber_options, lyft_options)
+        with metrics.stage("recommend"):
+            recommendations = self._generate_recommendations(uber_options, lyft_options)
         
         return {
             "uber": uber_options,
             "lyft": lyft_options,
             "recommendations": recommendations,
-            "comparison_summary": self._create_summary(uber_options, lyft_options)
+            "comparison_summary": self._create_summary(uber_options, lyft_options),
+            "provider_status": provider_status,
+            "partial": any(status not in _OK_STATUSES for status in provider_status.values()),
+            "estimated": any(status == _ESTIMATED for status in provider_status.values())
         }
     
-    def _parse_uber_data(self, data: Dict) -> List[Dict]:
-        """Parse Uber API response"""
-        options = []
-        for price in data.get("prices", []):
-            options.append({
-                "service": "Uber",
-                "ride_type": price["localized_display_name"],
-                "price_min": price["low_estimate"],
-                "price_max": price["high_estimate"],
-                "estimate_display": price["estimate"],
-                "duration_minutes": price.get("duration", 0),
-                "distance_miles": price.get("distance", 0),
-                "surge": price.get("surge_multiplier", 1.0),
-                "avg_price": (price["low_estimate"] + price["high_estimate"]) / 2
-            })
-        return options
-    
-    def _parse_lyft_data(self, data: Dict) -> List[Dict]:
-        """Parse Lyft API response"""
-        options = []
-        for cost in data.get("cost_estimates", []):
-            min_price = cost["estimated_cost_cents_min"] / 100
-            max_price = cost["estimated_cost_cents_max"] / 100
-            options.append({
-                "service": "Lyft",
-                "ride_type": cost["display_name"],
-                "price_min": min_price,
-                "price_max": max_price,
-                "estimate_display": f"${min_price:.0f}-{max_price:.0f}",
-                "duration_minutes": cost.get("estimated_duration_seconds", 0) / 60,
-                "distance_miles": cost.get("estimated_distance_miles", 0),
-                "surge": cost.get("primetime_percentage", "0%"),
-                "avg_price": (min_price + max_price) / 2
-            })
-        return options
+    @staticmethod
+    def _parse_uber_etas(data: Dict) -> Dict[str, float]:
+        """Parse an Uber time estimate response into minutes per ride type"""
+        return {
+            time_estimate["localized_display_name"]: time_estimate["estimate"] / 60
+            for time_estimate in data.get("times", [])
+            if time_estimate.get("localized_display_name") and time_estimate.get("estimate") is not None
+        }
+    
+    @staticmethod
+    def _parse_lyft_etas(data: Dict) -> Dict[str, float]:
+        """Parse a Lyft ETA response into minutes per ride type"""
+        return {
+            eta["display_name"]: eta["eta_seconds"] / 60
+            for eta in data.get("eta_estimates", [])
+            if eta.get("display_name") and eta.get("eta_seconds") is not None
+        }
     
     def _generate_recommendations(
         self,
-        uber_options: List[Dict],
-        lyft_options: List[Dict]
+        uber_options: List[FareOption],
+        lyft_options: List[FareOption]
     ) -> Dict:
         """Generate ride recommendations based on comparison"""
-        all_options = uber_options + lyft_options
-        
-        if not all_options:
-            return {"best_value": None, "fastest": None, "luxury": None}
-        
-        # Sort by average price
-        sorted_by_price = sorted(all_options, key=lambda x: x["avg_price"])
-        best_value = sorted_by_price[0] if sorted_by_price else None
-        
-        # Sort by duration
-        sorted_by_time = sorted(
-            [opt for opt in all_options if opt["duration_minutes"] > 0],
-            key=lambda x: x["duration_minutes"]
-        )
-        fastest = sorted_by_time[0] if sorted_by_time else None
-        
-        # Find luxury options
-        luxury_keywords = ["xl", "lux", "comfort", "black"]
-        luxury_options = [
-            opt for opt in all_options
-            if any(kw in opt["ride_type"].lower() for kw in luxury_keywords)
-        ]
-        luxury = min(luxury_options, key=lambda x: x["avg_price"]) if luxury_options else None
-        
-        return {
-            "best_value": best_value,
-            "fastest": fastest,
-            "luxury": luxury
-        }
+        return self.recommender.recommend(uber_options + lyft_options)
     
     def _create_summary(
         self,
-        uber_options: List[Dict],
-        lyft_options: List[Dict]
+        uber_options: List[FareOption],
+        lyft_options: List[FareOption]
     ) -> str:
         """Create a text summary of the comparison"""
         if not uber_options or not lyft_options:
             return "Unable to compare - missing data from one or both services."
         
-        uber_cheapest = min(uber_options, key=lambda x: x["avg_price"])
-        lyft_cheapest = min(lyft_options, key=lambda x: x["avg_price"])
+        uber_cheapest = min(uber_options, key=lambda x: x.avg_price)
+        lyft_cheapest = min(lyft_options, key=lambda x: x.avg_price)
         
-        if uber_cheapest["avg_price"] < lyft_cheapest["avg_price"]:
-            diff = lyft_cheapest["avg_price"] - uber_cheapest["avg_price"]
-            return f"Uber is cheaper by ${diff:.2f} on average. Best option: {uber_cheapest['ride_type']}"
-        elif lyft_cheapest["avg_price"] < uber_cheapest["avg_price"]:
-            diff = uber_cheapest["avg_price"] - lyft_cheapest["avg_price"]
-            return f"Lyft is cheaper by ${diff:.2f} on average. Best option: {lyft_cheapest['ride_type']}"
+        if uber_cheapest.avg_price < lyft_cheapest.avg_price:
+            diff = lyft_cheapest.avg_price - uber_cheapest.avg_price
+            return f"Uber is cheaper by ${diff:.2f} on average. Best option: {uber_cheapest.ride_type}"
+        elif lyft_cheapest.avg_price < uber_cheapest.avg_price:
+            diff = uber_cheapest.avg_price - lyft_cheapest.avg_price
+            return f"Lyft is cheaper by ${diff:.2f} on average. Best option: {lyft_cheapest.ride_type}"
         else:
             return "Prices are similar between Uber and Lyft."
 
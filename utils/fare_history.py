@@ -0,0 +1,240 @@
+"""
+Fare History
+============
+Append-only SQLite store of observed fares with a buffered background writer
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .fare_options import FareOption
+
+DEFAULT_HISTORY_PATH = os.path.join("data", "fare_history.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fares (
+    ts REAL NOT NULL,
+    start_lat REAL NOT NULL,
+    start_lng REAL NOT NULL,
+    end_lat REAL NOT NULL,
+    end_lng REAL NOT NULL,
+    service TEXT NOT NULL,
+    ride_type TEXT NOT NULL,
+    price_min REAL NOT NULL,
+    price_max REAL NOT NULL,
+    duration_minutes REAL,
+    distance_miles REAL,
+    surge REAL
+);
+CREATE INDEX IF NOT EXISTS fares_ts ON fares (ts);
+"""
+
+_INSERT = "INSERT INTO fares VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_COLUMNS = (
+    "ts", "start_lat", "start_lng", "end_lat", "end_lng", "service", "ride_type",
+    "price_min", "price_max", "duration_minutes", "distance_miles", "surge"
+)
+
+FareRow = Tuple
+
+# ``PRAGMA auto_vacuum`` value for INCREMENTAL
+_INCREMENTAL = 2
+
+
+class FareHistory:
+    """
+    Persists every observed ride option
+    
+    ``record`` only enqueues rows; a background thread writes them in
+    batched transactions, so the request path never touches the disk.
+    Rows older than ``retention_days`` are deleted periodically and the
+    freed pages returned to the filesystem.
+    """
+    
+    def __init__(
+        self,
+        path: str = DEFAULT_HISTORY_PATH,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 100000,
+        retention_days: float = 30.0,
+        compact_interval: float = 3600.0
+    ):
+        """
+        Args:
+            path: SQLite database file
+            batch_size: Maximum rows written per transaction
+            flush_interval: Maximum seconds a row waits before being written
+            max_pending: Rows buffered before new rows are dropped
+            retention_days: Age after which rows are deleted
+            compact_interval: Seconds between retention/compaction runs
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[FareRow]]" = queue.Queue(max_pending)
+        self._closed = threading.Event()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+        
+        self._writer = threading.Thread(target=self._run, name="cabfare-history", daemon=True)
+        self._writer.start()
+    
+    def _init_db(self):
+        """
+        Create the schema with incremental auto-vacuum enabled
+        
+        auto_vacuum only takes effect when set before the first table is
+        created and before the file switches to WAL; a file created without
+        it is converted once with a full VACUUM.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _INCREMENTAL:
+                conn.execute("VACUUM")
+            conn.execute("PRAGMA journal_mode = WAL").fetchall()
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+    
+    def record(
+        self,
+        coords: Tuple[float, float, float, float],
+        options: Iterable[FareOption],
+        ts: Optional[float] = None
+    ):
+        """
+        Queue ride options observed for a trip
+        
+        Args:
+            coords: (start_lat, start_lng, end_lat, end_lng)
+            options: Ride options returned by a provider
+            ts: Observation time, defaults to now
+        """
+        ts = time.time() if ts is None else ts
+        for opt in options:
+            row = (
+                ts, *coords, opt.service, opt.ride_type, opt.price_min, opt.price_max,
+                opt.duration_minutes, opt.distance_miles, opt.surge
+            )
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+    
+    def _run(self):
+        """Writer loop: drain the queue in batches and compact periodically"""
+        conn = self._connect()
+        next_compact = time.monotonic() + self.compact_interval
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        with conn:
+                            conn.executemany(_INSERT, batch)
+                        self.written += len(batch)
+                    except sqlite3.Error as e:
+                        print(f"Fare History Error: {e}")
+                        self.dropped += len(batch)
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    return
+                if time.monotonic() >= next_compact:
+                    try:
+                        self._compact(conn)
+                    except sqlite3.Error as e:
+                        print(f"Fare History Error: {e}")
+                    next_compact = time.monotonic() + self.compact_interval
+        finally:
+            conn.close()
+    
+    def _next_batch(self) -> Tuple[List[FareRow], bool]:
+        """Collect up to batch_size rows, waiting at most flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    row = self._queue.get(timeout=timeout)
+                else:
+                    row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                self._queue.task_done()
+                return batch, True
+            batch.append(row)
+        return batch, False
+    
+    def _compact(self, conn: sqlite3.Connection):
+        """Delete rows past retention and give freed pages back to the filesystem"""
+        cutoff = time.time() - self.retention_days * 86400
+        with conn:
+            conn.execute("DELETE FROM fares WHERE ts < ?", (cutoff,))
+        # incremental_vacuum frees one page per step and returns no rows, so
+        # execute() alone stops after the first page; executescript steps it
+        # to completion
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    
+    def compact(self):
+        """Apply the retention policy now (runs on the calling thread)"""
+        conn = self._connect()
+        try:
+            self._compact(conn)
+        finally:
+            conn.close()
+    
+    def flush(self, timeout: float = 10.0):
+        """Block until every row queued so far has been written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+    
+    def close(self, timeout: float = 10.0):
+        """Write any buffered rows and stop the writer thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._queue.put(None)
+        self._writer.join(timeout)
+    
+    def rows(self, since: Optional[float] = None) -> Iterator[dict]:
+        """
+        Iterate stored rows as dicts, oldest first
+        
+        Args:
+            since: Only rows observed at or after this Unix timestamp
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "SELECT * FROM fares WHERE ts >= ? ORDER BY ts",
+                (since or 0,)
+            )
+            for row in cursor:
+                yield dict(zip(_COLUMNS, row))
+        finally:
+            conn.close()
@@ -0,0 +1,241 @@
+"""
+Fare Model
+==========
+Lightweight local fare estimator used when a provider is slow or down
+
+Train offline from the fare history store:
+
+    python -m utils.fare_model --history data/fare_history.db --out models/fare_model.npz
+"""
+
+import argparse
+import math
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .fare_options import FareOption
+
+DEFAULT_MODEL_PATH = os.path.join("models", "fare_model.npz")
+
+# Observations needed before a ride type gets a model
+MIN_SAMPLES = 20
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+def haversine_miles(start_lat: float, start_lng: float, end_lat: float, end_lng: float) -> float:
+    """Great-circle distance between two points in miles"""
+    phi1 = math.radians(start_lat)
+    phi2 = math.radians(end_lat)
+    dphi = phi2 - phi1
+    dlmb = math.radians(end_lng - start_lng)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def trip_features(coords: Tuple[float, float, float, float], ts: float) -> List[float]:
+    """
+    Feature vector for a trip
+    
+    [bias, distance, sin(hour), cos(hour), weekend, distance * rush hour]
+    """
+    distance = haversine_miles(*coords)
+    t = time.localtime(ts)
+    angle = 2 * math.pi * (t.tm_hour + t.tm_min / 60) / 24
+    weekend = 1.0 if t.tm_wday >= 5 else 0.0
+    rush = 1.0 if not weekend and (7 <= t.tm_hour < 10 or 16 <= t.tm_hour < 19) else 0.0
+    return [1.0, distance, math.sin(angle), math.cos(angle), weekend, distance * rush]
+
+
+N_FEATURES = 6
+
+
+class FareModel:
+    """
+    Per-ride-type linear models for price and duration
+    
+    Weights live in a few NumPy arrays (one row per ride type), so the
+    whole model is a small .npz file and scoring is one dot product.
+    """
+    
+    def __init__(
+        self,
+        services: List[str],
+        ride_types: List[str],
+        price_weights: np.ndarray,
+        duration_weights: np.ndarray,
+        spreads: np.ndarray,
+        rmse: np.ndarray,
+        samples: np.ndarray
+    ):
+        self.services = list(services)
+        self.ride_types = list(ride_types)
+        self.price_weights = price_weights
+        self.duration_weights = duration_weights
+        self.spreads = spreads
+        self.rmse = rmse
+        self.samples = samples
+        self._by_service: Dict[str, List[int]] = {}
+        for i, service in enumerate(self.services):
+            self._by_service.setdefault(service.lower(), []).append(i)
+    
+    def has_service(self, service: str) -> bool:
+        return service.lower() in self._by_service
+    
+    def predict(
+        self,
+        service: str,
+        coords: Tuple[float, float, float, float],
+        ts: Optional[float] = None
+    ) -> List[FareOption]:
+        """
+        Estimate every known ride type of a service for a trip
+        
+        Args:
+            service: "uber" or "lyft"
+            coords: (start_lat, start_lng, end_lat, end_lng)
+            ts: Trip time, defaults to now
+        
+        Returns:
+            list: FareOptions flagged ``estimated`` with a 0-1 confidence
+        """
+        rows = self._by_service.get(service.lower())
+        if not rows:
+            return []
+        x = np.array(trip_features(coords, time.time() if ts is None else ts))
+        prices = self.price_weights[rows] @ x
+        durations = self.duration_weights[rows] @ x
+        distance = float(x[1])
+        options = []
+        for i, row in enumerate(rows):
+            price = max(float(prices[i]), 0.0)
+            half_spread = price * float(self.spreads[row]) / 2
+            options.append(FareOption(
+                self.services[row],
+                self.ride_types[row],
+                round(price - half_spread, 2),
+                round(price + half_spread, 2),
+                max(float(durations[i]), 0.0),
+                distance,
+                1.0,
+                estimated=True,
+                confidence=self._confidence(row, price)
+            ))
+        return options
+    
+    def _confidence(self, row: int, price: float) -> float:
+        """Shrinks with few samples and with error large relative to the price"""
+        n = float(self.samples[row])
+        fit = max(0.0, 1.0 - float(self.rmse[row]) / price) if price > 0 else 0.0
+        return round(fit * n / (n + MIN_SAMPLES), 2)
+    
+    @classmethod
+    def train(cls, rows: Iterable[Dict], ridge: float = 1e-2) -> "FareModel":
+        """
+        Fit the model from fare history rows (see FareHistory.rows)
+        
+        Args:
+            rows: Dicts with coordinates, ts, service, ride_type, prices
+                and duration_minutes
+            ridge: L2 regularization strength
+        
+        Returns:
+            FareModel: Trained model; ride types with fewer than
+                MIN_SAMPLES observations are skipped
+        """
+        grouped: Dict[Tuple[str, str], List[Tuple[List[float], float, float, float]]] = {}
+        for row in rows:
+            coords = (row["start_lat"], row["start_lng"], row["end_lat"], row["end_lng"])
+            avg = (row["price_min"] + row["price_max"]) / 2
+            spread = (row["price_max"] - row["price_min"]) / avg if avg else 0.0
+            grouped.setdefault((row["service"], row["ride_type"]), []).append(
+                (trip_features(coords, row["ts"]), avg, row["duration_minutes"] or 0.0, spread)
+            )
+        
+        services, ride_types, price_w, duration_w, spreads, rmse, samples = [], [], [], [], [], [], []
+        penalty = ridge * np.eye(N_FEATURES)
+        penalty[0, 0] = 0.0
+        for (service, ride_type), observations in grouped.items():
+            if len(observations) < MIN_SAMPLES:
+                continue
+            X = np.array([obs[0] for obs in observations])
+            prices = np.array([obs[1] for obs in observations])
+            durations = np.array([obs[2] for obs in observations])
+            gram = X.T @ X + penalty
+            w_price = np.linalg.solve(gram, X.T @ prices)
+            w_duration = np.linalg.solve(gram, X.T @ durations)
+            services.append(service)
+            ride_types.append(ride_type)
+            price_w.append(w_price)
+            duration_w.append(w_duration)
+            spreads.append(float(np.mean([obs[3] for obs in observations])))
+            rmse.append(float(np.sqrt(np.mean((X @ w_price - prices) ** 2))))
+            samples.append(len(observations))
+        
+        return cls(
+            services,
+            ride_types,
+            np.array(price_w).reshape(-1, N_FEATURES),
+            np.array(duration_w).reshape(-1, N_FEATURES),
+            np.array(spreads),
+            np.array(rmse),
+            np.array(samples)
+        )
+    
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """Write the model to a .npz file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            path,
+            services=np.array(self.services),
+            ride_types=np.array(self.ride_types),
+            price_weights=self.price_weights,
+            duration_weights=self.duration_weights,
+            spreads=self.spreads,
+            rmse=self.rmse,
+            samples=self.samples
+        )
+    
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> Optional["FareModel"]:
+        """Load a saved model, or None if the file does not exist"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(
+                [str(s) for s in data["services"]],
+                [str(r) for r in data["ride_types"]],
+                data["price_weights"],
+                data["duration_weights"],
+                data["spreads"],
+                data["rmse"],
+                data["samples"]
+            )
+
+
+def main():
+    """Train a model from the fare history database"""
+    from .fare_history import DEFAULT_HISTORY_PATH, FareHistory
+    
+    parser = argparse.ArgumentParser(description="Train the Cabfare fallback fare model")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="Fare history SQLite file")
+    parser.add_argument("--out", default=DEFAULT_MODEL_PATH, help="Output .npz path")
+    parser.add_argument("--days", type=float, default=30.0, help="Days of history to train on")
+    args = parser.parse_args()
+    
+    history = FareHistory(args.history)
+    try:
+        model = FareModel.train(history.rows(since=time.time() - args.days * 86400))
+    finally:
+        history.close()
+    model.save(args.out)
+    print(f"Trained {len(model.ride_types)} ride types -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Fare Options
+============
+Compact, normalized representation of a single ride option
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+UBER = "Uber"
+LYFT = "Lyft"
+
+# Keys exposed by the dict view, in display order
+OPTION_KEYS = (
+    "service",
+    "ride_type",
+    "price_min",
+    "price_max",
+    "estimate_display",
+    "duration_minutes",
+    "pickup_minutes",
+    "distance_miles",
+    "surge",
+    "avg_price",
+    "estimated",
+    "confidence"
+)
+
+
+def parse_primetime(value: Any) -> float:
+    """
+    Convert Lyft's ``primetime_percentage`` to a surge multiplier
+    
+    Args:
+        value: Percentage string such as "25%", or a number
+    
+    Returns:
+        float: Multiplier, e.g. 1.25 for "25%"
+    """
+    if value is None or value == "":
+        return 1.0
+    if isinstance(value, str):
+        value = value.strip().rstrip("%") or 0
+    return 1.0 + float(value) / 100
+
+
+def json_default(value: Any) -> Any:
+    """
+    ``json.dumps`` fallback that serializes FareOption via to_dict
+    
+    Raises:
+        TypeError: For any other non-JSON value
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class FareOption(Mapping):
+    """
+    One ride option from either provider
+    
+    Prices are dollars, durations minutes and surge a multiplier for both
+    services. Options predicted locally rather than quoted by the provider
+    have ``estimated`` set and a 0-1 ``confidence``. ``pickup_minutes`` is the
+    provider's wait for a driver, None when no ETA arrived in time. Behaves
+    as a read-only dict with the keys in OPTION_KEYS so code written against
+    the old list-of-dicts format keeps working.
+    """
+    
+    __slots__ = (
+        "service",
+        "ride_type",
+        "price_min",
+        "price_max",
+        "duration_minutes",
+        "distance_miles",
+        "surge",
+        "estimated",
+        "confidence",
+        "pickup_minutes",
+        "_display"
+    )
+    
+    def __init__(
+        self,
+        service: str,
+        ride_type: str,
+        price_min: float,
+        price_max: float,
+        duration_minutes: float = 0.0,
+        distance_miles: float = 0.0,
+        surge: float = 1.0,
+        estimate_display: Optional[str] = None,
+        estimated: bool = False,
+        confidence: Optional[float] = None,
+        pickup_minutes: Optional[float] = None
+    ):
+        self.service = service
+        self.ride_type = ride_type
+        self.price_min = price_min
+        self.price_max = price_max
+        self.duration_minutes = duration_minutes
+        self.distance_miles = distance_miles
+        self.surge = surge
+        self.estimated = estimated
+        self.confidence = confidence
+        self.pickup_minutes = pickup_minutes
+        self._display = estimate_display
+    
+    @classmethod
+    def from_uber(cls, price: Dict) -> "FareOption":
+        """Build from one entry of Uber's ``prices`` list; null fields use the defaults"""
+        return cls(
+            UBER,
+            price["localized_display_name"],
+            price["low_estimate"],
+            price["high_estimate"],
+            (price.get("duration") or 0) / 60,
+            price.get("distance") or 0,
+            price.get("surge_multiplier") or 1.0,
+            price["estimate"]
+        )
+    
+    @classmethod
+    def from_lyft(cls, cost: Dict) -> "FareOption":
+        """Build from one entry of Lyft's ``cost_estimates`` list; null fields use the defaults"""
+        return cls(
+            LYFT,
+            cost["display_name"],
+            cost["estimated_cost_cents_min"] / 100,
+            cost["estimated_cost_cents_max"] / 100,
+            (cost.get("estimated_duration_seconds") or 0) / 60,
+            cost.get("estimated_distance_miles") or 0,
+            parse_primetime(cost.get("primetime_percentage", "0%"))
+        )
+    
+    @property
+    def avg_price(self) -> float:
+        return (self.price_min + self.price_max) / 2
+    
+    @property
+    def estimate_display(self) -> str:
+        if self._display is None:
+            display = f"${self.price_min:.0f}-{self.price_max:.0f}"
+            return f"~{display} (est.)" if self.estimated else display
+        return self._display
+    
+    def with_pickup(self, pickup_minutes: Optional[float]) -> "FareOption":
+        """Copy of this option with a different pickup wait"""
+        return FareOption(
+            self.service,
+            self.ride_type,
+            self.price_min,
+            self.price_max,
+            self.duration_minutes,
+            self.distance_miles,
+            self.surge,
+            self._display,
+            self.estimated,
+            self.confidence,
+            pickup_minutes
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy, e.g. for JSON serialization"""
+        return {key: getattr(self, key) for key in OPTION_KEYS}
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in OPTION_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(OPTION_KEYS)
+    
+    def __len__(self) -> int:
+        return len(OPTION_KEYS)
+    
+    def __repr__(self) -> str:
+        return f"FareOption({self.service} {self.ride_type} {self.estimate_display})"
@@ -0,0 +1,223 @@
+"""
+Fare Rollups
+============
+Incrementally maintained price statistics per route, hour of week and ride type
+"""
+
+import bisect
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from .fare_options import FareOption
+from .geo import route_cells
+
+# Routes are bucketed on a coarser grid than the fare cache (~1 km)
+DEFAULT_ROUTE_CELL_SIZE = 0.01
+
+
+def hour_of_week(ts: float) -> int:
+    """Local hour of the week, 0 = Monday 00:00"""
+    t = time.localtime(ts)
+    return t.tm_wday * 24 + t.tm_hour
+
+
+class RouteStats:
+    """
+    Running statistics for one route/hour-of-week/ride-type bucket
+    
+    Prices are kept in a fixed-size uniform reservoir that is also held in
+    sorted order, so percentiles are an index lookup and each update costs
+    O(reservoir size) at worst.
+    """
+    
+    __slots__ = (
+        "count",
+        "min_price",
+        "surge_count",
+        "surge_episodes",
+        "surge_seconds",
+        "_samples",
+        "_sorted",
+        "_capacity"
+    )
+    
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.min_price = float("inf")
+        self.surge_count = 0
+        self.surge_episodes = 0
+        self.surge_seconds = 0.0
+        self._samples = []
+        self._sorted = []
+        self._capacity = capacity
+    
+    def add(self, price: float, surge: bool):
+        self.count += 1
+        if price < self.min_price:
+            self.min_price = price
+        if surge:
+            self.surge_count += 1
+        if len(self._samples) < self._capacity:
+            self._samples.append(price)
+            bisect.insort(self._sorted, price)
+            return
+        slot = random.randrange(self.count)
+        if slot < self._capacity:
+            old = self._samples[slot]
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+            self._samples[slot] = price
+            bisect.insort(self._sorted, price)
+    
+    def add_surge_episode(self, seconds: float):
+        self.surge_episodes += 1
+        self.surge_seconds += seconds
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Price at quantile ``q`` (0-1) of the sampled prices"""
+        if not self._sorted:
+            return None
+        index = min(int(q * len(self._sorted)), len(self._sorted) - 1)
+        return self._sorted[index]
+    
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "min_price": self.min_price if self.count else None,
+            "median_price": self.percentile(0.5),
+            "p90_price": self.percentile(0.9),
+            "surge_frequency": self.surge_count / self.count if self.count else 0.0,
+            "avg_surge_minutes": (
+                self.surge_seconds / self.surge_episodes / 60 if self.surge_episodes else None
+            )
+        }
+
+
+class FareRollups:
+    """
+    Per-route fare statistics updated as fares are observed
+    
+    Buckets are keyed on (pickup cell, dropoff cell, hour of week, ride
+    type). Every observation updates its bucket in place; nothing is ever
+    recomputed from raw history, so queries are dict lookups.
+    """
+    
+    def __init__(self, cell_size: float = DEFAULT_ROUTE_CELL_SIZE, reservoir_size: int = 128):
+        """
+        Args:
+            cell_size: Grid cell size in degrees for grouping routes
+            reservoir_size: Prices sampled per bucket for percentiles
+        """
+        self.cell_size = cell_size
+        self.reservoir_size = reservoir_size
+        self._buckets: Dict[Tuple, RouteStats] = {}
+        self._routes: Dict[Tuple, Dict[str, Dict[int, RouteStats]]] = {}
+        # (route, ride_type) -> (start time, hour of week) of a surge in progress
+        self._surge_started: Dict[Tuple, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def add(
+        self,
+        coords: Tuple[float, float, float, float],
+        ride_type: str,
+        price: float,
+        surge: float,
+        ts: Optional[float] = None
+    ):
+        """
+        Add one observed fare
+        
+        Args:
+            coords: (start_lat, start_lng, end_lat, end_lng)
+            ride_type: Ride type name
+            price: Average price in dollars
+            surge: Surge multiplier
+            ts: Observation time, defaults to now
+        """
+        ts = time.time() if ts is None else ts
+        route = route_cells(*coords, self.cell_size)
+        how = hour_of_week(ts)
+        surging = surge > 1.0
+        with self._lock:
+            stats = self._bucket(route, ride_type, how)
+            stats.add(price, surging)
+            
+            episode_key = (route, ride_type)
+            started = self._surge_started.get(episode_key)
+            if surging and started is None:
+                self._surge_started[episode_key] = (ts, how)
+            elif not surging and started is not None:
+                start_ts, start_how = self._surge_started.pop(episode_key)
+                self._bucket(route, ride_type, start_how).add_surge_episode(ts - start_ts)
+    
+    def add_options(
+        self,
+        coords: Tuple[float, float, float, float],
+        options: Iterable[FareOption],
+        ts: Optional[float] = None
+    ):
+        """Add every option a provider returned for a trip"""
+        for opt in options:
+            self.add(coords, opt.ride_type, opt.avg_price, opt.surge, ts)
+    
+    def _bucket(self, route: Tuple, ride_type: str, how: int) -> RouteStats:
+        key = (route, how, ride_type)
+        stats = self._buckets.get(key)
+        if stats is None:
+            stats = RouteStats(self.reservoir_size)
+            self._buckets[key] = stats
+            self._routes.setdefault(route, {}).setdefault(ride_type, {})[how] = stats
+        return stats
+    
+    def query(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        ts: Optional[float] = None,
+        ride_type: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        Typical fares for a route at a given hour of the week
+        
+        Args:
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+            ts: Time of interest, defaults to now
+            ride_type: Limit to one ride type
+        
+        Returns:
+            dict: Ride type -> statistics (count, min/median/p90 price,
+                surge frequency, average surge minutes)
+        """
+        route = route_cells(start_lat, start_lng, end_lat, end_lng, self.cell_size)
+        how = hour_of_week(time.time() if ts is None else ts)
+        with self._lock:
+            by_type = self._routes.get(route, {})
+            if ride_type is not None:
+                by_type = {ride_type: by_type[ride_type]} if ride_type in by_type else {}
+            return {
+                name: hours[how].to_dict()
+                for name, hours in by_type.items()
+                if how in hours
+            }
+    
+    def load(self, rows: Iterable[Dict]):
+        """
+        Replay stored history rows (oldest first), e.g. FareHistory.rows()
+        """
+        for row in rows:
+            self.add(
+                (row["start_lat"], row["start_lng"], row["end_lat"], row["end_lng"]),
+                row["ride_type"],
+                (row["price_min"] + row["price_max"]) / 2,
+                row["surge"] or 1.0,
+                row["ts"]
+            )
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
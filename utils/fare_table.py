@@ -0,0 +1,131 @@
+"""
+Fare Table
+==========
+Columnar NumPy storage for ride options across many trips
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .fare_options import LYFT, UBER, FareOption
+
+SERVICES = (UBER, LYFT)
+_SERVICE_IDS = {name: i for i, name in enumerate(SERVICES)}
+
+FARE_DTYPE = np.dtype([
+    ("trip", np.uint32),
+    ("service", np.uint8),
+    ("ride_type", np.uint16),
+    ("price_min", np.float32),
+    ("price_max", np.float32),
+    ("duration_minutes", np.float32),
+    ("distance_miles", np.float32),
+    ("surge", np.float32),
+    ("pickup_minutes", np.float32),
+    ("estimated", np.bool_),
+    ("confidence", np.float32)
+])
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+
+def _none_if_nan(value: np.floating) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+class FareTable:
+    """
+    Growable structured array of ride options
+    
+    Each row is one option for one trip. Service and ride type names are
+    stored once in lookup lists and referenced by small integer ids, so a
+    batch of millions of options costs 36 bytes per row instead of a dict.
+    A missing pickup ETA or confidence is stored as NaN.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self._rows = np.empty(capacity, dtype=FARE_DTYPE)
+        self._size = 0
+        self.ride_types: List[str] = []
+        self._ride_type_ids: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def rows(self) -> np.ndarray:
+        """Structured array view of the filled rows"""
+        return self._rows[:self._size]
+    
+    def column(self, name: str) -> np.ndarray:
+        """One column as a NumPy array, e.g. ``column("price_min")``"""
+        return self.rows[name]
+    
+    def ride_type_id(self, ride_type: str) -> int:
+        """Integer id for a ride type name, assigning a new one if needed"""
+        ride_type_id = self._ride_type_ids.get(ride_type)
+        if ride_type_id is None:
+            ride_type_id = len(self.ride_types)
+            self.ride_types.append(ride_type)
+            self._ride_type_ids[ride_type] = ride_type_id
+        return ride_type_id
+    
+    def append(self, trip: int, options: Iterable[FareOption]):
+        """
+        Add the options for one trip
+        
+        Args:
+            trip: Trip index
+            options: Ride options for the trip
+        """
+        for opt in options:
+            if self._size == len(self._rows):
+                self._rows = np.resize(self._rows, max(1, 2 * len(self._rows)))
+            self._rows[self._size] = (
+                trip,
+                _SERVICE_IDS[opt.service],
+                self.ride_type_id(opt.ride_type),
+                opt.price_min,
+                opt.price_max,
+                opt.duration_minutes,
+                opt.distance_miles,
+                opt.surge,
+                _nan_if_none(opt.pickup_minutes),
+                opt.estimated,
+                _nan_if_none(opt.confidence)
+            )
+            self._size += 1
+    
+    def option(self, row: int) -> FareOption:
+        """Materialize one row as a FareOption"""
+        record = self._rows[row]
+        return FareOption(
+            SERVICES[record["service"]],
+            self.ride_types[record["ride_type"]],
+            float(record["price_min"]),
+            float(record["price_max"]),
+            float(record["duration_minutes"]),
+            float(record["distance_miles"]),
+            float(record["surge"]),
+            estimated=bool(record["estimated"]),
+            confidence=_none_if_nan(record["confidence"]),
+            pickup_minutes=_none_if_nan(record["pickup_minutes"])
+        )
+    
+    @classmethod
+    def from_batch(cls, results: Iterable[Dict]) -> "FareTable":
+        """
+        Build a table from FareComparator.compare_fares_batch results
+        
+        Failed trips contribute no rows.
+        """
+        table = cls()
+        for result in results:
+            comparison = result.get("comparison")
+            if comparison:
+                table.append(result["index"], comparison["uber"])
+                table.append(result["index"], comparison["lyft"])
+        return table
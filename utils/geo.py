@@ -0,0 +1,40 @@
+"""
+Geo Helpers
+===========
+Coordinate quantization shared by the caches and route statistics
+"""
+
+import math
+from typing import Tuple
+
+# Default grid cell size in degrees (~110 m of latitude)
+DEFAULT_CELL_SIZE = 0.001
+
+
+def quantize(lat: float, lng: float, cell_size: float = DEFAULT_CELL_SIZE) -> Tuple[int, int]:
+    """
+    Snap a coordinate to a grid cell
+    
+    Args:
+        lat: Latitude
+        lng: Longitude
+        cell_size: Grid cell size in degrees
+    
+    Returns:
+        tuple: Integer (row, col) cell index
+    """
+    return (math.floor(lat / cell_size), math.floor(lng / cell_size))
+
+
+def route_cells(
+    start_lat: float,
+    start_lng: float,
+    end_lat: float,
+    end_lng: float,
+    cell_size: float = DEFAULT_CELL_SIZE
+) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Quantize a pickup/dropoff pair to its grid cells"""
+    return (
+        quantize(start_lat, start_lng, cell_size),
+        quantize(end_lat, end_lng, cell_size)
+    )
@@ -0,0 +1,75 @@
+"""
+Hot Route Tracking
+==================
+Tracks which quantized routes are requested often enough to keep warm
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+
+Coords = Tuple[float, float, float, float]
+
+
+class HotRouteTracker:
+    """
+    Exponentially decayed request counter per route
+    
+    Each request adds 1 to the route's score and scores decay with a
+    half-life of ``half_life`` seconds. Routes scoring at least
+    ``threshold`` are considered hot. The most recent coordinates seen for
+    a route are kept so it can be re-fetched proactively.
+    """
+    
+    def __init__(self, threshold: float = 3.0, half_life: float = 300.0, max_routes: int = 1000):
+        """
+        Args:
+            threshold: Decayed request count at which a route is hot
+            half_life: Seconds for a route's score to halve
+            max_routes: Maximum routes tracked (least recently seen dropped)
+        """
+        self.threshold = threshold
+        self.half_life = half_life
+        self.max_routes = max_routes
+        self._decay = math.log(2) / half_life
+        self._routes: "OrderedDict[Hashable, Tuple[float, float, Coords]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def record(self, route: Hashable, coords: Coords):
+        """Record a request for a route"""
+        now = time.monotonic()
+        with self._lock:
+            score = self._score(route, now) + 1.0
+            self._routes[route] = (score, now, coords)
+            self._routes.move_to_end(route)
+            while len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+    
+    def score(self, route: Hashable) -> float:
+        """Current decayed request count for a route"""
+        with self._lock:
+            return self._score(route, time.monotonic())
+    
+    def hot_routes(self) -> List[Tuple[Hashable, Coords]]:
+        """Routes currently at or above the threshold, hottest first"""
+        now = time.monotonic()
+        with self._lock:
+            scored = [
+                (self._score(route, now), route, coords)
+                for route, (_, _, coords) in self._routes.items()
+            ]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(route, coords) for score, route, coords in scored if score >= self.threshold]
+    
+    def stats(self) -> Dict[str, int]:
+        """Number of tracked and hot routes"""
+        return {"tracked": len(self._routes), "hot": len(self.hot_routes())}
+    
+    def _score(self, route: Hashable, now: float) -> float:
+        entry = self._routes.get(route)
+        if entry is None:
+            return 0.0
+        score, seen_at, _ = entry
+        return score * math.exp(-self._decay * (now - seen_at))
@@ -0,0 +1,255 @@
+"""
+HTTP Connection Pool
+====================
+Pooled, keep-alive HTTP clients shared by the provider APIs
+"""
+
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+from .rate_limiter import RateLimiter
+from .resilience import CircuitBreaker, LatencyTracker
+
+# Never hedge sooner than this, even if p95 latency is lower
+MIN_HEDGE_DELAY = 0.05
+
+
+class PoolConfig:
+    """Connection pool and timeout settings for a provider"""
+    
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        http2: bool = False
+    ):
+        """
+        Args:
+            max_connections: Maximum concurrent connections to the provider
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection stays in the pool
+            connect_timeout: TCP/TLS connect timeout in seconds
+            read_timeout: Response read timeout in seconds
+            http2: Use HTTP/2 when the ``h2`` package is installed
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+    
+    def limits(self) -> httpx.Limits:
+        """Connection limits for httpx"""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+    
+    def timeout(self) -> httpx.Timeout:
+        """Request timeouts for httpx"""
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.read_timeout,
+            pool=self.connect_timeout
+        )
+
+
+def _healthy(response: httpx.Response) -> bool:
+    """Whether a response counts as a success for the circuit breaker"""
+    return response.status_code < 500 and response.status_code != 429
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class HTTPPool:
+    """
+    Keep-alive HTTP clients for one provider
+    
+    A single sync client serves all blocking calls; async calls get one
+    client per event loop, since httpx connections cannot be shared
+    between loops. Connections are reused across every endpoint of the
+    provider so the TCP+TLS handshake is paid once per connection.
+    
+    Every call goes through an optional rate limiter and circuit breaker.
+    Async calls can be hedged: if a response has not arrived by the
+    provider's observed p95 latency, a duplicate request is sent and the
+    first answer wins.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        config: Optional[PoolConfig] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: bool = False,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Args:
+            base_url: Provider API base URL
+            headers: Headers sent with every request
+            config: Connection pool and timeout settings
+            breaker: Circuit breaker guarding the provider, or None
+            hedge: Send a hedged duplicate for async calls slower than p95
+            rate_limiter: Shared token buckets for the provider's quota
+        """
+        self.base_url = base_url
+        self.headers = headers
+        self.config = config or PoolConfig()
+        self._http2 = self.config.http2
+        if self._http2 and not _http2_available():
+            print("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+            self._http2 = False
+        self.breaker = breaker
+        self.hedge = hedge
+        self.rate_limiter = rate_limiter
+        self.latency = LatencyTracker()
+        self.hedged = 0
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()
+    
+    def _client_kwargs(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "headers": self.headers,
+            "limits": self.config.limits(),
+            "timeout": self.config.timeout(),
+            "http2": self._http2
+        }
+    
+    @property
+    def client(self) -> httpx.Client:
+        """Shared blocking client"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs())
+        return self._client
+    
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Async client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            with self._lock:
+                client = self._async_clients.get(loop)
+                if client is None:
+                    client = httpx.AsyncClient(**self._client_kwargs())
+                    self._async_clients[loop] = client
+        return client
+    
+    def get(self, path: str, params: Dict) -> httpx.Response:
+        """Blocking GET relative to the provider base URL"""
+        # The breaker is asked first so a rejected call never spends a token
+        probe = self.breaker.before_call() if self.breaker is not None else None
+        if self.rate_limiter is not None:
+            try:
+                self.rate_limiter.acquire(path)
+            except BaseException:
+                self._release(probe)
+                raise
+        start = time.perf_counter()
+        try:
+            response = self.client.get(path, params=params)
+        except BaseException:
+            # Any failure, including cancellation or a bug, must free a half-open probe slot
+            self._record(False, start, probe)
+            raise
+        self._record(_healthy(response), start, probe)
+        self._check_quota(path, response)
+        return response
+    
+    async def get_async(self, path: str, params: Dict) -> httpx.Response:
+        """Async GET relative to the provider base URL"""
+        probe = self.breaker.before_call() if self.breaker is not None else None
+        if self.rate_limiter is not None:
+            try:
+                await self.rate_limiter.acquire_async(path)
+            except BaseException:
+                self._release(probe)
+                raise
+        start = time.perf_counter()
+        try:
+            if self.hedge:
+                response = await self._hedged_get(path, params)
+            else:
+                response = await self.async_client.get(path, params=params)
+        except BaseException:
+            # Failures and abandoned calls (e.g. a deadline) must free a half-open probe slot
+            self._record(False, start, probe)
+            raise
+        self._record(_healthy(response), start, probe)
+        self._check_quota(path, response)
+        return response
+    
+    async def _hedged_get(self, path: str, params: Dict) -> httpx.Response:
+        """GET that sends a duplicate request once the call outlives p95 latency"""
+        client = self.async_client
+        p95 = self.latency.percentile(0.95)
+        if p95 is None:
+            return await client.get(path, params=params)
+        
+        first = asyncio.ensure_future(client.get(path, params=params))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=max(p95, MIN_HEDGE_DELAY))
+            # A hedge is only worth sending if it doesn't eat into the quota
+            if not done and (self.rate_limiter is None or await self.rate_limiter.try_acquire_async(path) == 0.0):
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(client.get(path, params=params)))
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None or not pending:
+                        return task.result()
+                tasks = pending
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _check_quota(self, path: str, response: httpx.Response):
+        """Drain the shared bucket when the provider says we are over quota"""
+        if response.status_code == 429 and self.rate_limiter is not None:
+            self.rate_limiter.penalize(path)
+    
+    def _release(self, probe: Optional[int]):
+        """Give back a breaker slot for a call that never reached the provider"""
+        if self.breaker is not None:
+            self.breaker.release(probe)
+    
+    def _record(self, success: bool, start: float, probe: Optional[int]):
+        elapsed = time.perf_counter() - start
+        if success:
+            self.latency.record(elapsed)
+        if self.breaker is not None:
+            self.breaker.record(success, elapsed, probe)
+    
+    def close(self):
+        """Close the blocking client and drop its pooled connections"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+    
+    async def aclose(self):
+        """Close the async client for the running event loop"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
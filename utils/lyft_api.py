@@ -4,24 +4,57 @@ Lyft API Integration
 Handles communication with Lyft Rides API
 """
 
-import os
-import requests
+import httpx
 from typing import Dict, Optional
-from dotenv import load_dotenv
+from . import metrics
+from .config import get_setting
+from .http_pool import HTTPPool, PoolConfig
+from .provider_schemas import DecodedOptions, decode_options
+from .rate_limiter import RateLimiter
+from .resilience import CircuitBreaker
 
-load_dotenv()
+DEFAULT_BASE_URL = "https://api.lyft.com/v1"
 
 
 class LyftAPI:
     """Lyft Rides API client"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv('LYFT_API_KEY')
-        self.base_url = "https://api.lyft.com/v1"
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        pool_config: Optional[PoolConfig] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_requests: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None
+    ):
+        """
+        Args:
+            api_key: Lyft API key, defaults to LYFT_API_KEY
+            pool_config: Connection pool and timeout settings
+            breaker: Circuit breaker, defaults to one with standard thresholds
+            hedge_requests: Send a duplicate request when an async call
+                outlives the provider's observed p95 latency
+            rate_limiter: Cross-process quota limiter, defaults to one
+                configured from LYFT_RATE_LIMIT / LYFT_RATE_BURST if set
+            base_url: API root, defaults to LYFT_API_BASE_URL or the
+                public Lyft API
+        """
+        self.api_key = api_key or get_setting('LYFT_API_KEY')
+        self.base_url = base_url or get_setting('LYFT_API_BASE_URL', DEFAULT_BASE_URL)
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.breaker = breaker or CircuitBreaker("Lyft")
+        self.http = HTTPPool(
+            self.base_url,
+            self.headers,
+            pool_config,
+            breaker=self.breaker,
+            hedge=hedge_requests,
+            rate_limiter=rate_limiter or RateLimiter.from_env("Lyft")
+        )
     
     def get_cost_estimate(
         self, 
@@ -42,7 +75,7 @@ class LyftAPI:
         Returns:
             dict: Cost estimates for different ride types
         """
-        endpoint = f"{self.base_url}/cost"
+        endpoint = "/cost"
         params = {
             "start_lat": start_lat,
             "start_lng": start_lng,
@@ -50,13 +83,54 @@ class LyftAPI:
             "end_lng": end_lng
         }
         
-        try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Lyft API Error: {e}")
+        response = self._get(endpoint, params)
+        if response is None:
             return self._get_mock_data()
+        return response.json()
+    
+    async def get_cost_options_async(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float
+    ) -> DecodedOptions:
+        """
+        Get cost estimates decoded straight into ride options
+        
+        Malformed options are skipped and counted rather than failing the
+        whole response.
+        
+        Args:
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+        
+        Returns:
+            DecodedOptions: Ride options, marked as fallback when mock data
+                was used
+        
+        Raises:
+            ValueError: If the response body is not a valid cost estimates payload
+        """
+        endpoint = "/cost"
+        params = {
+            "start_lat": start_lat,
+            "start_lng": start_lng,
+            "end_lat": end_lat,
+            "end_lng": end_lng
+        }
+        
+        response = await self._get_async(endpoint, params)
+        if response is None:
+            return decode_options("lyft", self._get_mock_data(), fallback=True)
+        
+        decoded = decode_options("lyft", response.content)
+        if decoded.rejected:
+            metrics.increment("provider_rejected_options", decoded.rejected, provider="lyft")
+            print(f"Lyft API Error: skipped {decoded.rejected} malformed cost estimates")
+        return decoded
     
     def get_eta(self, lat: float, lng: float) -> Dict:
         """
@@ -69,23 +143,75 @@ class LyftAPI:
         Returns:
             dict: ETA estimates for different ride types
         """
-        endpoint = f"{self.base_url}/eta"
+        endpoint = "/eta"
         params = {
             "lat": lat,
             "lng": lng
         }
         
+        response = self._get(endpoint, params)
+        if response is None:
+            return {}
+        return response.json()
+    
+    async def get_eta_async(self, lat: float, lng: float) -> Dict:
+        """
+        Get ETA for pickup without blocking the event loop
+        
+        Args:
+            lat: Pickup latitude
+            lng: Pickup longitude
+        
+        Returns:
+            dict: ETA estimates for different ride types, empty on
+                failure; failures are counted in metrics, not printed
+        """
+        endpoint = "/eta"
+        params = {
+            "lat": lat,
+            "lng": lng
+        }
+        
+        response = await self._get_async(endpoint, params, quiet=True)
+        if response is None:
+            return {}
+        return response.json()
+    
+    def _get(self, endpoint: str, params: Dict, quiet: bool = False) -> Optional[httpx.Response]:
+        """
+        GET an endpoint, returning None once a failure has been counted and
+        printed (only counted if ``quiet``)
+        """
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            with metrics.stage("provider_request", provider="lyft", endpoint=endpoint):
+                response = self.http.get(endpoint, params)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Lyft API Error: {e}")
-            return {}
+            return response
+        except httpx.HTTPError as e:
+            self._request_failed(endpoint, e, quiet)
+            return None
+    
+    async def _get_async(self, endpoint: str, params: Dict, quiet: bool = False) -> Optional[httpx.Response]:
+        """Async version of _get"""
+        try:
+            with metrics.stage("provider_request", provider="lyft", endpoint=endpoint):
+                response = await self.http.get_async(endpoint, params)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            self._request_failed(endpoint, e, quiet)
+            return None
+    
+    def _request_failed(self, endpoint: str, error: httpx.HTTPError, quiet: bool):
+        metrics.increment("provider_errors", provider="lyft", endpoint=endpoint, error=type(error).__name__)
+        if quiet:
+            return
+        print(f"Lyft API Error: {error}")
     
     def _get_mock_data(self) -> Dict:
         """Mock data for testing without API key"""
         return {
+            "fallback": True,
             "cost_estimates": [
                 {
                     "display_name": "Lyft",
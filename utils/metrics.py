@@ -0,0 +1,254 @@
+"""
+Metrics
+=======
+Per-stage timings and counters with pluggable hooks and a Prometheus exporter
+"""
+
+import math
+import re
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class MetricsHook:
+    """
+    Receiver for instrumentation events
+    
+    Subclass and register with add_hook to forward timings and counters to
+    any backend. Hooks are called inline on hot paths, so keep them cheap.
+    """
+    
+    def observe(self, stage: str, seconds: float, labels: Dict[str, str]):
+        """A stage took ``seconds``"""
+    
+    def increment(self, name: str, value: float, labels: Dict[str, str]):
+        """Counter ``name`` grew by ``value``"""
+
+
+# Replaced rather than mutated, so call sites iterate without locking
+_hooks: Tuple[MetricsHook, ...] = ()
+_hooks_lock = threading.Lock()
+
+_DISABLED = nullcontext()
+
+
+def add_hook(hook: MetricsHook):
+    """Start sending events to a hook"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: MetricsHook):
+    """Stop sending events to a hook"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def enabled() -> bool:
+    """Whether any hook is registered"""
+    return bool(_hooks)
+
+
+class _Stage:
+    __slots__ = ("name", "labels", "start")
+    
+    def __init__(self, name: str, labels: Dict[str, str]):
+        self.name = name
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        for hook in _hooks:
+            hook.observe(self.name, elapsed, self.labels)
+        return False
+
+
+def stage(name: str, **labels: str):
+    """
+    Time a block as one stage
+    
+    Returns a shared no-op context manager while no hook is registered,
+    so disabled instrumentation costs one call and one check.
+    
+    Args:
+        name: Stage name, e.g. "provider_request"
+        **labels: Extra dimensions, e.g. provider="uber"
+    """
+    if not _hooks:
+        return _DISABLED
+    return _Stage(name, labels)
+
+
+def observe(name: str, seconds: float, **labels: str):
+    """Record a stage duration measured by the caller"""
+    for hook in _hooks:
+        hook.observe(name, seconds, labels)
+
+
+def increment(name: str, value: float = 1.0, **labels: str):
+    """Grow a counter"""
+    for hook in _hooks:
+        hook.increment(name, value, labels)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _flatten(prefix: str, value, out: Dict[str, float]):
+    """Collect numeric leaves of a nested stats dict"""
+    if isinstance(value, (bool, int, float)):
+        out[_INVALID_NAME_CHARS.sub("_", prefix)] = float(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}", item, out)
+
+
+class PrometheusExporter(MetricsHook):
+    """
+    Aggregates events into Prometheus histograms and counters
+    
+    Stage timings become ``<namespace>_stage_seconds{stage="..."}``
+    histograms and counters ``<namespace>_<name>_total``. Stats callables
+    registered with add_source (e.g. ``FareComparator.stats`` for cache hit
+    ratios) are exported as gauges when rendered.
+    """
+    
+    def __init__(self, namespace: str = "cabfare", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            namespace: Prefix for every metric name
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[LabelKey, List] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._sources: Dict[str, Callable[[], Dict]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+    
+    def observe(self, stage: str, seconds: float, labels: Dict[str, str]):
+        key = _label_key({"stage": stage, **labels})
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = histogram[0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            histogram[1] += seconds
+            histogram[2] += 1
+    
+    def increment(self, name: str, value: float, labels: Dict[str, str]):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+    
+    def add_source(self, name: str, stats: Callable[[], Dict]):
+        """
+        Export a stats callable as gauges
+        
+        Args:
+            name: Gauge prefix, e.g. "comparator"
+            stats: Returns a (nested) dict; numeric leaves become gauges
+        """
+        self._sources[name] = stats
+    
+    def render(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        
+        if histograms:
+            lines.append(f"# TYPE {ns}_stage_seconds histogram")
+            for key, (counts, total, count) in sorted(histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{ns}_stage_seconds_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{ns}_stage_seconds_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{ns}_stage_seconds_sum{_format_labels(key)} {total}")
+                lines.append(f"{ns}_stage_seconds_count{_format_labels(key)} {count}")
+        
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {ns}_{name}_total counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{ns}_{name}_total{_format_labels(key)} {value}")
+        
+        for name, stats in list(self._sources.items()):
+            gauges: Dict[str, float] = {}
+            try:
+                _flatten(f"{ns}_{name}", stats(), gauges)
+            except Exception as e:
+                print(f"Metrics Error: {e}")
+                continue
+            for gauge, value in gauges.items():
+                if math.isfinite(value):
+                    lines.append(f"# TYPE {gauge} gauge")
+                    lines.append(f"{gauge} {value}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """Serve ``/metrics`` over HTTP from a daemon thread"""
+        exporter = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="cabfare-metrics", daemon=True).start()
+    
+    def close(self):
+        """Stop the HTTP endpoint, if serving"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
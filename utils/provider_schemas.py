@@ -0,0 +1,133 @@
+"""
+Provider Schemas
+================
+Typed Uber and Lyft price schemas decoded straight from JSON into FareOption
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from .fare_options import FareOption
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+
+Payload = Union[bytes, str, Dict[str, Any]]
+
+
+class DecodedOptions:
+    """
+    Ride options decoded from one provider response
+    
+    Cached responses are shared by every comparison they serve, so the
+    object and its options are treated as read-only.
+    """
+    
+    __slots__ = ("options", "rejected", "fallback")
+    
+    def __init__(self, options: List[FareOption], rejected: int = 0, fallback: bool = False):
+        """
+        Args:
+            options: Valid ride options, in response order
+            rejected: Malformed options that were skipped
+            fallback: Whether the options are mock data rather than a
+                provider answer
+        """
+        self.options = options
+        self.rejected = rejected
+        self.fallback = fallback
+    
+    def __repr__(self) -> str:
+        return f"DecodedOptions({len(self.options)} options, {self.rejected} rejected)"
+
+
+# Returned when a provider gave no usable response
+NO_OPTIONS = DecodedOptions([])
+
+# Provider -> (validator, key of the options list); built on first use
+_adapters: Dict[str, Tuple["TypeAdapter", str]] = {}
+_lock = threading.Lock()
+
+
+def _build_adapters() -> Dict[str, Tuple["TypeAdapter", str]]:
+    """Compile the response schemas"""
+    # pydantic adds ~100 ms to startup, so it is only imported with the first response
+    from pydantic import AfterValidator, Field, TypeAdapter
+    from typing_extensions import Annotated, NotRequired, TypedDict
+    
+    # Providers send null as well as omitting optional fields
+    class UberPrice(TypedDict):
+        localized_display_name: str
+        low_estimate: float
+        high_estimate: float
+        estimate: str
+        duration: NotRequired[Optional[float]]
+        distance: NotRequired[Optional[float]]
+        surge_multiplier: NotRequired[Optional[float]]
+    
+    class LyftCost(TypedDict):
+        display_name: str
+        estimated_cost_cents_min: float
+        estimated_cost_cents_max: float
+        estimated_duration_seconds: NotRequired[Optional[float]]
+        estimated_distance_miles: NotRequired[Optional[float]]
+        primetime_percentage: NotRequired[Optional[Union[str, float]]]
+    
+    # An option that fails its schema falls through to Any and is dropped
+    # afterwards; cheaper than a Python wrap validator around every item
+    UberItem = Annotated[
+        Union[Annotated[UberPrice, AfterValidator(FareOption.from_uber)], Any],
+        Field(union_mode="left_to_right")
+    ]
+    LyftItem = Annotated[
+        Union[Annotated[LyftCost, AfterValidator(FareOption.from_lyft)], Any],
+        Field(union_mode="left_to_right")
+    ]
+    
+    class UberPrices(TypedDict):
+        prices: List[UberItem]
+    
+    class LyftCosts(TypedDict):
+        cost_estimates: List[LyftItem]
+    
+    return {
+        "uber": (TypeAdapter(UberPrices), "prices"),
+        "lyft": (TypeAdapter(LyftCosts), "cost_estimates")
+    }
+
+
+def _adapter(provider: str) -> Tuple["TypeAdapter", str]:
+    if not _adapters:
+        with _lock:
+            if not _adapters:
+                _adapters.update(_build_adapters())
+    return _adapters[provider]
+
+
+def decode_options(provider: str, payload: Payload, fallback: bool = False) -> DecodedOptions:
+    """
+    Validate a price response and build its FareOptions in one pass
+    
+    JSON bytes are parsed and validated by pydantic-core without first
+    building the whole response as Python objects; only the fields an
+    option uses are materialized. Options missing a required field or with
+    a wrongly typed one are skipped and counted in ``rejected``.
+    
+    Args:
+        provider: "uber" (``/estimates/price``) or "lyft" (``/cost``)
+        payload: Raw JSON body, or an already parsed response dict
+        fallback: Mark the result as mock data
+    
+    Returns:
+        DecodedOptions: Valid options and the number rejected
+    
+    Raises:
+        ValueError: If the body is not JSON or has no options list
+    """
+    adapter, key = _adapter(provider)
+    if isinstance(payload, (bytes, str)):
+        items = adapter.validate_json(payload)[key]
+    else:
+        items = adapter.validate_python(payload)[key]
+    options = [option for option in items if isinstance(option, FareOption)]
+    return DecodedOptions(options, len(items) - len(options), fallback)
@@ -0,0 +1,214 @@
+"""
+Rate Limiter
+============
+Token buckets per provider endpoint, shared across processes through a local file
+"""
+
+import asyncio
+import contextvars
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from .config import get_setting
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are shared between threads only
+    fcntl = None
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Priority of the provider calls made in the current context
+request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), "cabfare-ratelimit")
+
+_STATE = struct.Struct("dd")  # tokens, last refill (wall clock)
+
+
+class RateLimitedError(httpx.TransportError):
+    """Raised when an interactive request cannot get a token in time"""
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for one provider's endpoints
+    
+    Each endpoint has a bucket holding up to ``burst`` tokens that refills
+    at ``rate`` tokens per second. Bucket state lives in a small file
+    guarded by ``flock``, so every process on the host using the same
+    ``state_dir`` draws from the same quota.
+    
+    Interactive requests may use every token and wait at most
+    ``interactive_wait`` seconds before failing. Batch requests (see
+    ``request_priority``) leave ``batch_reserve`` of the burst for
+    interactive traffic and queue until a token is free instead of failing.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        state_dir: str = DEFAULT_STATE_DIR,
+        batch_reserve: float = 0.2,
+        interactive_wait: float = 2.0
+    ):
+        """
+        Args:
+            name: Provider name, part of the shared bucket file names
+            rate: Default tokens added per second
+            burst: Default bucket capacity
+            endpoint_limits: Per-endpoint (rate, burst) overrides, keyed by path
+            state_dir: Directory holding the shared bucket files
+            batch_reserve: Fraction of the burst batch requests may not use
+            interactive_wait: Longest an interactive request waits for a token
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_limits = endpoint_limits or {}
+        self.state_dir = state_dir
+        self.batch_reserve = batch_reserve
+        self.interactive_wait = interactive_wait
+        self.throttled = 0
+        self.rejected = 0
+        self._thread_lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+    
+    @classmethod
+    def from_env(cls, name: str) -> Optional["RateLimiter"]:
+        """
+        Build a limiter from ``<NAME>_RATE_LIMIT`` (requests per second) and
+        optional ``<NAME>_RATE_BURST``, or return None if unset
+        
+        Raises:
+            ValueError: If the rate is not positive or the burst is below 1
+        """
+        prefix = name.upper()
+        rate = get_setting(f"{prefix}_RATE_LIMIT")
+        if not rate:
+            return None
+        rate = float(rate)
+        if not rate > 0:
+            raise ValueError(f"{prefix}_RATE_LIMIT must be positive, got {rate}")
+        burst = float(get_setting(f"{prefix}_RATE_BURST") or max(rate, 1.0))
+        if not burst >= 1:
+            raise ValueError(f"{prefix}_RATE_BURST must be at least 1, got {burst}")
+        return cls(name, rate, burst)
+    
+    def _limits(self, endpoint: str) -> Tuple[float, float]:
+        return self.endpoint_limits.get(endpoint, (self.rate, self.burst))
+    
+    def _path(self, endpoint: str) -> str:
+        safe = endpoint.strip("/").replace("/", "_") or "root"
+        return os.path.join(self.state_dir, f"{self.name.lower()}-{safe}.bucket")
+    
+    @contextmanager
+    def _locked_state(self, endpoint: str) -> Iterator[list]:
+        """Yield [tokens, last_refill] for a bucket, written back on exit"""
+        rate, burst = self._limits(endpoint)
+        with self._thread_lock:
+            fd = os.open(self._path(endpoint), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, _STATE.size)
+                state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else [burst, time.time()]
+                yield state
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, _STATE.pack(*state))
+            finally:
+                os.close(fd)  # closing releases the flock
+    
+    def try_acquire(self, endpoint: str, priority: Optional[str] = None) -> float:
+        """
+        Take a token if one is available
+        
+        Args:
+            endpoint: Endpoint path, e.g. "/estimates/price"
+            priority: INTERACTIVE or BATCH, defaults to request_priority
+        
+        Returns:
+            float: 0 if a token was taken, else seconds until one should be
+        """
+        rate, burst = self._limits(endpoint)
+        priority = priority or request_priority.get()
+        reserve = burst * self.batch_reserve if priority == BATCH else 0.0
+        with self._locked_state(endpoint) as state:
+            now = time.time()
+            tokens = min(burst, state[0] + max(now - state[1], 0.0) * rate)
+            state[1] = now
+            if tokens - 1.0 >= reserve:
+                state[0] = tokens - 1.0
+                return 0.0
+            state[0] = tokens
+            return (1.0 + reserve - tokens) / rate
+    
+    def acquire(self, endpoint: str):
+        """
+        Block until a token is available
+        
+        Raises:
+            RateLimitedError: If an interactive request would wait longer
+                than interactive_wait
+        """
+        deadline = self._deadline()
+        wait = self.try_acquire(endpoint)
+        if wait > 0.0:
+            self.throttled += 1
+        while wait > 0.0:
+            self._check_deadline(deadline, wait)
+            time.sleep(wait)
+            wait = self.try_acquire(endpoint)
+    
+    async def try_acquire_async(self, endpoint: str, priority: Optional[str] = None) -> float:
+        """
+        try_acquire on a worker thread
+        
+        The bucket file lock may be held by another process, so it is never
+        waited for on the event loop.
+        """
+        priority = priority or request_priority.get()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.try_acquire, endpoint, priority)
+    
+    async def acquire_async(self, endpoint: str):
+        """Async version of acquire"""
+        deadline = self._deadline()
+        wait = await self.try_acquire_async(endpoint)
+        if wait > 0.0:
+            self.throttled += 1
+        while wait > 0.0:
+            self._check_deadline(deadline, wait)
+            await asyncio.sleep(wait)
+            wait = await self.try_acquire_async(endpoint)
+    
+    def _deadline(self) -> Optional[float]:
+        if request_priority.get() == BATCH:
+            return None
+        return time.monotonic() + self.interactive_wait
+    
+    def _check_deadline(self, deadline: Optional[float], wait: float):
+        if deadline is not None and time.monotonic() + wait > deadline:
+            self.rejected += 1
+            raise RateLimitedError(f"{self.name} rate limit exceeded")
+    
+    def penalize(self, endpoint: str):
+        """Empty a bucket after the provider answered 429"""
+        with self._locked_state(endpoint) as state:
+            state[0] = 0.0
+            state[1] = time.time()
+    
+    def stats(self) -> Dict[str, int]:
+        """Throttled and rejected request counts for this process"""
+        return {"throttled": self.throttled, "rejected": self.rejected}
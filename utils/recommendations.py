@@ -0,0 +1,180 @@
+"""
+Recommendation Engine
+=====================
+Picks best value, fastest, luxury and best overall ride options
+"""
+
+from typing import Dict, Iterable, Optional
+
+from .fare_options import FareOption
+
+# Known ride types and whether they count as luxury
+LUXURY_RIDE_TYPES: Dict[str, bool] = {
+    "UberX": False,
+    "UberXL": True,
+    "Uber Comfort": True,
+    "Uber Black": True,
+    "Uber Black SUV": True,
+    "UberPool": False,
+    "Lyft": False,
+    "Lyft XL": True,
+    "Lux": True,
+    "Lux Black": True,
+    "Lux Black XL": True,
+    "Shared": False
+}
+
+_LUXURY_KEYWORDS = ("xl", "lux", "comfort", "black")
+
+
+def is_luxury(ride_type: str) -> bool:
+    """
+    Whether a ride type is a luxury option
+    
+    Unknown ride types are classified once by keyword and added to
+    LUXURY_RIDE_TYPES, so every later lookup is a dict hit.
+    """
+    luxury = LUXURY_RIDE_TYPES.get(ride_type)
+    if luxury is None:
+        name = ride_type.lower()
+        luxury = any(kw in name for kw in _LUXURY_KEYWORDS)
+        LUXURY_RIDE_TYPES[ride_type] = luxury
+    return luxury
+
+
+class ScoreWeights:
+    """
+    Weights for the combined price/time/comfort score
+    
+    The score is in dollars and lower is better:
+    ``price * avg_price + time * duration_minutes - comfort * is_luxury``.
+    ``time`` is what a minute is worth to the rider and ``comfort`` what
+    they would pay extra for a luxury ride.
+    """
+    
+    def __init__(self, price: float = 1.0, time: float = 0.5, comfort: float = 0.0):
+        self.price = price
+        self.time = time
+        self.comfort = comfort
+    
+    def score(self, option: FareOption) -> float:
+        """Weighted score for one option"""
+        comfort = self.comfort if is_luxury(option.ride_type) else 0.0
+        return self.price * option.avg_price + self.time * option.duration_minutes - comfort
+
+
+class RecommendationEngine:
+    """Computes ride recommendations for one trip or a whole batch"""
+    
+    def __init__(self, weights: Optional[ScoreWeights] = None):
+        self.weights = weights or ScoreWeights()
+    
+    def recommend(self, options: Iterable[FareOption]) -> Dict[str, Optional[FareOption]]:
+        """
+        Recommend options for one trip in a single pass
+        
+        The fastest option has the shortest pickup wait plus trip duration.
+        Options without a pickup ETA are assumed to wait as long as the
+        slowest known pickup, so a missing ETA never wins on its own; with
+        no ETAs at all only trip duration counts.
+        
+        Args:
+            options: All ride options for the trip
+        
+        Returns:
+            dict: best_value, fastest, luxury and best_overall options
+                (None when no option qualifies)
+        """
+        best_value = fastest = luxury = best_overall = None
+        fastest_unknown_wait = None
+        best_score = fastest_total = max_wait = 0.0
+        weights = self.weights
+        for opt in options:
+            price = opt.avg_price
+            if best_value is None or price < best_value.avg_price:
+                best_value = opt
+            if opt.duration_minutes > 0:
+                wait = opt.pickup_minutes
+                if wait is None:
+                    if fastest_unknown_wait is None or opt.duration_minutes < fastest_unknown_wait.duration_minutes:
+                        fastest_unknown_wait = opt
+                else:
+                    max_wait = max(max_wait, wait)
+                    total = opt.duration_minutes + wait
+                    if fastest is None or total < fastest_total:
+                        fastest, fastest_total = opt, total
+            if is_luxury(opt.ride_type) and (luxury is None or price < luxury.avg_price):
+                luxury = opt
+            score = weights.score(opt)
+            if best_overall is None or score < best_score:
+                best_overall, best_score = opt, score
+        
+        if fastest_unknown_wait is not None and (
+            fastest is None or fastest_unknown_wait.duration_minutes + max_wait < fastest_total
+        ):
+            fastest = fastest_unknown_wait
+        
+        return {
+            "best_value": best_value,
+            "fastest": fastest,
+            "luxury": luxury,
+            "best_overall": best_overall
+        }
+    
+    def recommend_table(self, table) -> Dict:
+        """
+        Recommend options for every trip in a FareTable at once
+        
+        Ranks like ``recommend``: the fastest option has the shortest
+        pickup wait plus trip duration, with a missing ETA charged the
+        trip's slowest known pickup.
+        
+        Args:
+            table: FareTable holding options for many trips
+        
+        Returns:
+            dict: ``trip`` array of trip indices plus ``best_value``,
+                ``fastest``, ``luxury`` and ``best_overall`` arrays of row
+                indices into the table (-1 when no option qualifies)
+        """
+        # NumPy is only needed for batch work; keep single-trip imports light
+        import numpy as np
+        
+        rows = table.rows
+        trips = rows["trip"]
+        avg_price = (rows["price_min"].astype(np.float64) + rows["price_max"]) / 2
+        duration = rows["duration_minutes"].astype(np.float64)
+        pickup = rows["pickup_minutes"].astype(np.float64)
+        luxury_lookup = np.array([is_luxury(name) for name in table.ride_types], dtype=bool)
+        luxury = luxury_lookup[rows["ride_type"]] if len(luxury_lookup) else np.zeros(len(rows), dtype=bool)
+        
+        weights = self.weights
+        score = weights.price * avg_price + weights.time * duration - weights.comfort * luxury
+        
+        trip_ids, trip_rows = np.unique(trips, return_inverse=True)
+        known = (duration > 0) & ~np.isnan(pickup)
+        max_wait = np.zeros(len(trip_ids))
+        np.maximum.at(max_wait, trip_rows[known], pickup[known])
+        wait = np.where(np.isnan(pickup), max_wait[trip_rows], pickup)
+        
+        result = {"trip": trip_ids}
+        for name, values in (
+            ("best_value", avg_price),
+            ("fastest", np.where(duration > 0, duration + wait, np.inf)),
+            ("luxury", np.where(luxury, avg_price, np.inf)),
+            ("best_overall", score)
+        ):
+            result[name] = _group_argmin(trips, values)
+        return result
+
+
+def _group_argmin(groups, values):
+    """Row index of the smallest finite value within each group (-1 if none)"""
+    import numpy as np
+    
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    best = order[first]
+    return np.where(np.isfinite(values[best]), best, -1)
@@ -0,0 +1,174 @@
+"""
+Resilience
+==========
+Circuit breaker and latency tracking for provider clients
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies"""
+    
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of recent latencies kept
+            min_samples: Samples required before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile ``q`` (0-1), or None with too few samples"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker
+    
+    Tracks the outcome of the last ``window`` calls. A call fails if it
+    raised, returned 429/5xx, or took longer than ``slow_call_seconds``.
+    Once at least ``min_calls`` are recorded and the failure rate reaches
+    ``failure_rate_threshold`` the circuit opens and calls are rejected for
+    ``open_seconds``. After that it goes half-open and lets
+    ``half_open_probes`` trial calls through: a success closes the
+    circuit, a failure opens it again.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 3.0,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1
+    ):
+        """
+        Args:
+            name: Provider name, used in errors and stats
+            failure_rate_threshold: Failure fraction (0-1) that opens the circuit
+            slow_call_seconds: Calls slower than this count as failures
+            window: Number of recent calls considered
+            min_calls: Calls required before the circuit can open
+            open_seconds: Seconds to reject calls before probing
+            half_open_probes: Concurrent trial calls allowed when half-open
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.rejected = 0
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+    
+    def before_call(self) -> Optional[int]:
+        """
+        Check whether a call may proceed
+        
+        Returns:
+            The probe token to pass to record/release if the call is a
+            half-open trial, else None
+        
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with all
+                probe slots taken)
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open")
+                self._probes += 1
+                # Identifies this half-open period; opening again starts a new one
+                return self.opened
+            return None
+    
+    def _is_current_probe(self, probe: Optional[int]) -> bool:
+        return probe is not None and self.state == HALF_OPEN and probe == self.opened
+    
+    def release(self, probe: Optional[int] = None):
+        """Give back the slot of an allowed call that was never made"""
+        with self._lock:
+            if self._is_current_probe(probe):
+                self._probes = max(self._probes - 1, 0)
+    
+    def record(self, success: bool, seconds: float, probe: Optional[int] = None):
+        """
+        Record the outcome of a call that was allowed by before_call
+        
+        Only the probes of the current half-open period decide whether it
+        closes or opens again; calls that started earlier are ignored
+        until the circuit is closed.
+        """
+        ok = success and seconds <= self.slow_call_seconds
+        with self._lock:
+            if self._is_current_probe(probe):
+                self._probes = max(self._probes - 1, 0)
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            if self.state != CLOSED:
+                return
+            self._outcomes.append(ok)
+            if len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                    self._open()
+    
+    def _open(self):
+        self.state = OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+    
+    def stats(self) -> Dict:
+        """Current state and counters"""
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "failure_rate": self._outcomes.count(False) / calls if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,181 @@
+"""
+Shared Services
+===============
+Process-wide fare comparator and LLM clients shared by every session
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from . import metrics
+from .chatbot import CabfareChatbot
+from .config import get_setting
+from .fare_comparator import FareComparator
+from .fare_history import FareHistory
+from .fare_rollups import FareRollups
+from .metrics import PrometheusExporter
+from .resilience import LatencyTracker
+from .summary_cache import SummaryCache
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+_instances: Dict[str, Any] = {}
+# Reentrant so a factory may build the instances it depends on
+_lock = threading.RLock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+# Days of stored history replayed into the rollups at startup
+DEFAULT_ROLLUP_DAYS = 28
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    """Build an instance once per process, even with concurrent callers"""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def _build_comparator() -> FareComparator:
+    from .fare_model import FareModel
+    
+    if get_setting('CABFARE_METRICS_PORT'):
+        get_metrics_exporter()
+    history = rollups = None
+    history_path = get_setting('CABFARE_HISTORY_PATH')
+    if history_path:
+        history = FareHistory(history_path)
+        rollups = FareRollups()
+        since = time.time() - float(get_setting('CABFARE_ROLLUP_DAYS', str(DEFAULT_ROLLUP_DAYS))) * 86400
+        threading.Thread(
+            target=_warm_rollups,
+            args=(rollups, history, since),
+            name="cabfare-rollups",
+            daemon=True
+        ).start()
+    return FareComparator(
+        history=history,
+        rollups=rollups,
+        fare_model=FareModel.load(),
+        pickup_etas=get_setting('CABFARE_PICKUP_ETAS', '') == '1'
+    )
+
+
+def _warm_rollups(rollups: FareRollups, history: FareHistory, since: float):
+    """Replay recent history into the rollups without holding up startup"""
+    try:
+        rollups.load(history.rows(since=since))
+    except sqlite3.Error as e:
+        print(f"Fare History Error: {e}")
+
+
+def get_comparator() -> FareComparator:
+    """
+    The process-wide FareComparator
+    
+    Its provider connection pools, fare cache, rate limiters, history and
+    rollups are shared by every caller. Fare history and rollups are only
+    kept when CABFARE_HISTORY_PATH names the SQLite file; the rollups are
+    warmed in the background from the last CABFARE_ROLLUP_DAYS days.
+    Pickup ETAs cost extra provider requests and are only fetched with
+    CABFARE_PICKUP_ETAS=1.
+    """
+    return _get_or_create("comparator", _build_comparator)
+
+
+def _build_openai_client() -> "OpenAI":
+    from openai import OpenAI
+    return OpenAI(api_key=get_setting('OPENAI_API_KEY'))
+
+
+def get_openai_client() -> "OpenAI":
+    """The process-wide OpenAI client (thread-safe, pooled connections)"""
+    return _get_or_create("openai", _build_openai_client)
+
+
+def get_async_openai_client() -> "AsyncOpenAI":
+    """
+    The AsyncOpenAI client for the running event loop
+    
+    Async connection pools cannot be shared between loops, so there is one
+    client per loop, created on first use.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=get_setting('OPENAI_API_KEY'))
+            _async_clients[loop] = client
+    return client
+
+
+def get_summary_cache() -> SummaryCache:
+    """The process-wide summary cache"""
+    return _get_or_create("summary_cache", lambda: SummaryCache(
+        ttl=float(get_setting('CABFARE_SUMMARY_CACHE_TTL', '600')),
+        path=get_setting('CABFARE_SUMMARY_CACHE_PATH') or None
+    ))
+
+
+def get_first_token_latency() -> LatencyTracker:
+    """The process-wide time-to-first-token tracker"""
+    return _get_or_create("first_token_latency", lambda: LatencyTracker(min_samples=1))
+
+
+def create_chatbot() -> CabfareChatbot:
+    """
+    A chatbot for one session
+    
+    Only its conversation memory is per session; clients, the summary
+    cache and metrics are shared.
+    """
+    return CabfareChatbot(
+        client_factory=get_openai_client,
+        async_client_factory=get_async_openai_client,
+        summary_cache=get_summary_cache(),
+        first_token_latency=get_first_token_latency()
+    )
+
+
+def _source(name: str) -> Callable[[], Dict]:
+    """Stats of a shared instance, empty until it has been built"""
+    def stats() -> Dict:
+        instance = _instances.get(name)
+        return instance.stats() if instance is not None else {}
+    return stats
+
+
+def _build_metrics_exporter() -> PrometheusExporter:
+    exporter = PrometheusExporter()
+    exporter.add_source("comparator", _source("comparator"))
+    exporter.add_source("summary_cache", _source("summary_cache"))
+    exporter.add_source("first_token", lambda: {
+        "p50_seconds": get_first_token_latency().percentile(0.5),
+        "p95_seconds": get_first_token_latency().percentile(0.95)
+    })
+    metrics.add_hook(exporter)
+    port = get_setting('CABFARE_METRICS_PORT')
+    if port:
+        exporter.serve(int(port))
+    return exporter
+
+
+def get_metrics_exporter() -> PrometheusExporter:
+    """
+    The process-wide Prometheus exporter
+    
+    Created on first call, which turns instrumentation on. If
+    CABFARE_METRICS_PORT is set it also serves ``/metrics`` on that port
+    and is started automatically with the shared comparator.
+    """
+    return _get_or_create("metrics", _build_metrics_exporter)
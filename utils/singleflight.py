@@ -0,0 +1,143 @@
+"""
+Request Coalescing
+==================
+Collapses concurrent identical calls into a single execution
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight call and the callers waiting on it"""
+    
+    __slots__ = ("future", "waiters", "task")
+    
+    def __init__(self):
+        self.future = Future()
+        # Running futures cannot be cancelled by one impatient waiter
+        self.future.set_running_or_notify_cancel()
+        self.waiters = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call among every concurrent caller with the same key
+    
+    The first caller for a key (the leader) runs the call; callers arriving
+    while it is in flight wait for and receive the leader's result. Results
+    are held in thread-safe futures, so threaded callers (``do``) and
+    asyncio callers on any event loop (``do_async``) can wait on the same
+    call.
+    
+    An async call runs as its own task, so cancelling a caller - the
+    leader included - only stops that caller's wait. The task itself is
+    cancelled once every caller has given up on it.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        """Return the call for ``key`` and whether the caller is the leader"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+            return call, leader
+    
+    def _leave(self, key: Hashable, call: _Call) -> bool:
+        """Drop a waiter; True if it was the last one and the call is unfinished"""
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters or call.future.done():
+                return False
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            return True
+    
+    def _finish(self, key: Hashable, call: _Call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+    
+    def _settle(self, key: Hashable, call: _Call, task: asyncio.Task):
+        """Copy a finished task's outcome to the shared future"""
+        self._finish(key, call)
+        if task.cancelled():
+            if call.waiters:
+                # Cancelled from inside; the waiters themselves were not
+                call.future.set_exception(RuntimeError("Shared call was cancelled"))
+            else:
+                call.future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            call.future.set_exception(task.exception())
+        else:
+            call.future.set_result(task.result())
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` once for all concurrent threaded callers with ``key``
+        
+        Args:
+            key: Identity of the call
+            fn: Zero-argument callable
+        
+        Returns:
+            The (shared) result of ``fn``
+        """
+        call, leader = self._join(key)
+        try:
+            if not leader:
+                return call.future.result()
+            try:
+                result = fn()
+            except BaseException as e:
+                call.future.set_exception(e)
+                raise
+            call.future.set_result(result)
+            return result
+        finally:
+            self._leave(key, call)
+            if leader:
+                self._finish(key, call)
+    
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``fn()`` once for all concurrent callers with ``key``
+        
+        Args:
+            key: Identity of the call
+            fn: Zero-argument callable returning an awaitable
+        
+        Returns:
+            The (shared) result of ``fn()``
+        """
+        call, leader = self._join(key)
+        if leader:
+            call.task = asyncio.ensure_future(fn())
+            call.task.add_done_callback(lambda task: self._settle(key, call, task))
+        try:
+            return await asyncio.wrap_future(call.future)
+        finally:
+            if self._leave(key, call) and call.task is not None:
+                call.task.get_loop().call_soon_threadsafe(call.task.cancel)
+    
+    def stats(self) -> Dict[str, int]:
+        """Executed and coalesced call counts"""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
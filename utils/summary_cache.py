@@ -0,0 +1,180 @@
+"""
+Summary Cache
+=============
+TTL + LRU cache for LLM fare summaries keyed on normalized fare context
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def normalize_context(context: str) -> str:
+    """Canonical form of formatted fare data: trimmed lines, single spaces, no blanks"""
+    lines = (" ".join(line.split()) for line in context.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class SummaryCache:
+    """
+    Bounded cache of generated summaries
+    
+    Keys are a SHA-256 of the model name and the normalized fare context,
+    so identical fare tables reuse a summary regardless of whitespace. When
+    ``path`` is set, entries are persisted to a JSON file and reloaded on
+    start; expiry uses wall-clock time so it survives restarts. Changes are
+    written at most once per ``flush_interval`` and at exit, outside the
+    lock that lookups take.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: float = 600.0,
+        path: Optional[str] = None,
+        flush_interval: float = 5.0
+    ):
+        """
+        Args:
+            max_size: Maximum number of entries before LRU eviction
+            ttl: Seconds a summary stays valid
+            path: Optional JSON file to persist entries to
+            flush_interval: Seconds changes may wait before being written
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._load()
+            atexit.register(self.flush)
+    
+    @staticmethod
+    def make_key(model: str, context: str) -> str:
+        """
+        Build a cache key for a summary request
+        
+        Args:
+            model: LLM model name
+            context: Output of CabfareChatbot._format_fare_data
+        
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(model.encode())
+        digest.update(b"\0")
+        digest.update(normalize_context(context).encode())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached summary, or None on miss or expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: str, summary: str):
+        """Store a summary, persisting it if a path is configured"""
+        with self._lock:
+            self._entries[key] = (summary, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self.path:
+                self._mark_dirty()
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._mark_dirty()
+    
+    def flush(self):
+        """Write pending changes to ``path`` now"""
+        with self._save_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = [[key, summary, expires_at] for key, (summary, expires_at) in self._entries.items()]
+            self._save(entries)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Summary Cache Error: {e}")
+            return
+        now = time.time()
+        for key, summary, expires_at in stored:
+            if expires_at > now:
+                self._entries[key] = (summary, expires_at)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def _mark_dirty(self):
+        """Schedule a flush; caller holds the lock"""
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _save(self, entries: List[list]):
+        """Write entries atomically through a temp file private to this process"""
+        directory = os.path.dirname(self.path) or "."
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Summary Cache Error: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
@@ -4,24 +4,57 @@ Uber API Integration
 Handles communication with Uber Rides API
 """
 
-import os
-import requests
+import httpx
 from typing import Dict, Optional
-from dotenv import load_dotenv
+from . import metrics
+from .config import get_setting
+from .http_pool import HTTPPool, PoolConfig
+from .provider_schemas import DecodedOptions, decode_options
+from .rate_limiter import RateLimiter
+from .resilience import CircuitBreaker
 
-load_dotenv()
+DEFAULT_BASE_URL = "https://api.uber.com/v1.2"
 
 
 class UberAPI:
     """Uber Rides API client"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv('UBER_API_KEY')
-        self.base_url = "https://api.uber.com/v1.2"
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        pool_config: Optional[PoolConfig] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_requests: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None
+    ):
+        """
+        Args:
+            api_key: Uber API key, defaults to UBER_API_KEY
+            pool_config: Connection pool and timeout settings
+            breaker: Circuit breaker, defaults to one with standard thresholds
+            hedge_requests: Send a duplicate request when an async call
+                outlives the provider's observed p95 latency
+            rate_limiter: Cross-process quota limiter, defaults to one
+                configured from UBER_RATE_LIMIT / UBER_RATE_BURST if set
+            base_url: API root, defaults to UBER_API_BASE_URL or the
+                public Uber API
+        """
+        self.api_key = api_key or get_setting('UBER_API_KEY')
+        self.base_url = base_url or get_setting('UBER_API_BASE_URL', DEFAULT_BASE_URL)
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.breaker = breaker or CircuitBreaker("Uber")
+        self.http = HTTPPool(
+            self.base_url,
+            self.headers,
+            pool_config,
+            breaker=self.breaker,
+            hedge=hedge_requests,
+            rate_limiter=rate_limiter or RateLimiter.from_env("Uber")
+        )
     
     def get_price_estimate(
         self, 
@@ -42,7 +75,7 @@ class UberAPI:
         Returns:
             dict: Price estimates for different ride types
         """
-        endpoint = f"{self.base_url}/estimates/price"
+        endpoint = "/estimates/price"
         params = {
             "start_latitude": start_lat,
             "start_longitude": start_lng,
@@ -50,13 +83,54 @@ class UberAPI:
             "end_longitude": end_lng
         }
         
-        try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Uber API Error: {e}")
+        response = self._get(endpoint, params)
+        if response is None:
             return self._get_mock_data()
+        return response.json()
+    
+    async def get_price_options_async(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float
+    ) -> DecodedOptions:
+        """
+        Get price estimates decoded straight into ride options
+        
+        Malformed options are skipped and counted rather than failing the
+        whole response.
+        
+        Args:
+            start_lat: Pickup latitude
+            start_lng: Pickup longitude
+            end_lat: Dropoff latitude
+            end_lng: Dropoff longitude
+        
+        Returns:
+            DecodedOptions: Ride options, marked as fallback when mock data
+                was used
+        
+        Raises:
+            ValueError: If the response body is not a valid price estimates payload
+        """
+        endpoint = "/estimates/price"
+        params = {
+            "start_latitude": start_lat,
+            "start_longitude": start_lng,
+            "end_latitude": end_lat,
+            "end_longitude": end_lng
+        }
+        
+        response = await self._get_async(endpoint, params)
+        if response is None:
+            return decode_options("uber", self._get_mock_data(), fallback=True)
+        
+        decoded = decode_options("uber", response.content)
+        if decoded.rejected:
+            metrics.increment("provider_rejected_options", decoded.rejected, provider="uber")
+            print(f"Uber API Error: skipped {decoded.rejected} malformed price estimates")
+        return decoded
     
     def get_time_estimate(self, lat: float, lng: float) -> Dict:
         """
@@ -69,23 +143,75 @@ class UberAPI:
         Returns:
             dict: Time estimates for different ride types
         """
-        endpoint = f"{self.base_url}/estimates/time"
+        endpoint = "/estimates/time"
         params = {
             "start_latitude": lat,
             "start_longitude": lng
         }
         
+        response = self._get(endpoint, params)
+        if response is None:
+            return {}
+        return response.json()
+    
+    async def get_time_estimate_async(self, lat: float, lng: float) -> Dict:
+        """
+        Get time estimates for pickup without blocking the event loop
+        
+        Args:
+            lat: Pickup latitude
+            lng: Pickup longitude
+        
+        Returns:
+            dict: Time estimates for different ride types, empty on
+                failure; failures are counted in metrics, not printed
+        """
+        endpoint = "/estimates/time"
+        params = {
+            "start_latitude": lat,
+            "start_longitude": lng
+        }
+        
+        response = await self._get_async(endpoint, params, quiet=True)
+        if response is None:
+            return {}
+        return response.json()
+    
+    def _get(self, endpoint: str, params: Dict, quiet: bool = False) -> Optional[httpx.Response]:
+        """
+        GET an endpoint, returning None once a failure has been counted and
+        printed (only counted if ``quiet``)
+        """
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            with metrics.stage("provider_request", provider="uber", endpoint=endpoint):
+                response = self.http.get(endpoint, params)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Uber API Error: {e}")
-            return {}
+            return response
+        except httpx.HTTPError as e:
+            self._request_failed(endpoint, e, quiet)
+            return None
+    
+    async def _get_async(self, endpoint: str, params: Dict, quiet: bool = False) -> Optional[httpx.Response]:
+        """Async version of _get"""
+        try:
+            with metrics.stage("provider_request", provider="uber", endpoint=endpoint):
+                response = await self.http.get_async(endpoint, params)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            self._request_failed(endpoint, e, quiet)
+            return None
+    
+    def _request_failed(self, endpoint: str, error: httpx.HTTPError, quiet: bool):
+        metrics.increment("provider_errors", provider="uber", endpoint=endpoint, error=type(error).__name__)
+        if quiet:
+            return
+        print(f"Uber API Error: {error}")
     
     def _get_mock_data(self) -> Dict:
         """Mock data for testing without API key"""
         return {
+            "fallback": True,
             "prices": [
                 {
                     "localized_display_name": "UberX",
@@ -93,7 +219,7 @@ class UberAPI:
                     "low_estimate": 15,
                     "high_estimate": 20,
                     "surge_multiplier": 1.0,
-                    "duration": 12,
+                    "duration": 720,
                     "distance": 5.2
                 },
                 {
@@ -102,7 +228,7 @@ class UberAPI:
                     "low_estimate": 22,
                     "high_estimate": 28,
                     "surge_multiplier": 1.0,
-                    "duration": 12,
+                    "duration": 720,
                     "distance": 5.2
                 },
                 {
@@ -111,7 +237,7 @@ class UberAPI:
                     "low_estimate": 18,
                     "high_estimate": 24,
                     "surge_multiplier": 1.0,
-                    "duration": 12,
+                    "duration": 720,
                     "distance": 5.2
                 }
             ]